@@ -1,5 +1,8 @@
-from typing import Dict, List
-from importlib.metadata import entry_points
+import sys
+from dataclasses import dataclass
+from importlib.machinery import ExtensionFileLoader
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from importlib.metadata import EntryPoint, entry_points
 
 from dirigo.hw_interfaces.hw_interface import Device
 
@@ -7,6 +10,21 @@ from dirigo.hw_interfaces.hw_interface import Device
 DIRIGO_DEVICE_PREFIX = "dirigo.devices."
 
 
+# (group, name) -> loaded class; see `invalidate_device_classes`
+_device_class_cache: Dict[Tuple[str, str], type[Device]] = {}
+_EXTENSION_SUFFIXES = (".so", ".pyd")
+
+
+@dataclass(frozen=True)
+class _InstalledModules:
+    names: FrozenSet[str]  # dotted module names; "pkg.*" stands for a whole package
+    native: bool           # includes compiled extension modules
+
+
+# (group, name) -> modules installed by the providing distribution, or None if unknown
+_device_class_modules: Dict[Tuple[str, str], Optional[_InstalledModules]] = {}
+
+
 class EntryPointNotFound(LookupError):
     pass
 
@@ -50,10 +68,8 @@ def discover_entry_point_names(group: str) -> List[str]:
     return sorted({ep.name for ep in items})
 
 
-def load_device_class(group: str, name: str) -> type[Device]:
-    """
-    Load the entry point object for (group, name).
-    """
+def _select_entry_point(group: str, name: str) -> EntryPoint:
+    """Return the single entry point (group, name), or raise."""
     matches = list(entry_points().select(group=group, name=name))
 
     if not matches:
@@ -66,8 +82,21 @@ def load_device_class(group: str, name: str) -> type[Device]:
             f"Multiple entry points found for group={group!r}, name={name!r}: "
             + ", ".join(repr(ep.value) for ep in matches)
         )
-    
-    obj = matches[0].load()
+    return matches[0]
+
+
+def load_device_class(group: str, name: str) -> type[Device]:
+    """
+    Load the entry point object for (group, name).
+
+    Loaded classes are cached until `invalidate_device_classes` is called for them.
+    """
+    cached = _device_class_cache.get((group, name))
+    if cached is not None:
+        return cached
+
+    ep = _select_entry_point(group, name)
+    obj = ep.load()
 
     if not isinstance(obj, type):
         raise EntryPointInvalidType(
@@ -80,4 +109,101 @@ def load_device_class(group: str, name: str) -> type[Device]:
             f"which is not a subclass of Device."
         )
 
-    return obj
\ No newline at end of file
+    _device_class_cache[(group, name)] = obj
+    _device_class_modules[(group, name)] = _distribution_modules(ep.dist)
+    return obj
+
+
+def _distribution_modules(dist) -> Optional[_InstalledModules]:
+    """
+    The modules a distribution installed, from its RECORD. Falls back to the
+    packages in top_level.txt (every module below them). Returns None if
+    neither is available.
+    """
+    if dist is None:
+        return None
+
+    files = dist.files
+    if files:
+        out: Set[str] = set()
+        native = False
+        for f in files:
+            parts = f.parts
+            if not parts or any(
+                p == ".." or p == "__pycache__" or p.endswith((".dist-info", ".egg-info", ".data"))
+                for p in parts
+            ):
+                continue
+            last = parts[-1]
+            if last.endswith(".py"):
+                stem = last[:-3]
+            elif last.endswith(_EXTENSION_SUFFIXES):
+                stem = last.split(".", 1)[0]
+            else:
+                continue
+            names = list(parts[:-1]) + ([] if stem == "__init__" else [stem])
+            if names and all(n.isidentifier() for n in names):
+                out.add(".".join(names))
+                native = native or last.endswith(_EXTENSION_SUFFIXES)
+        return _InstalledModules(frozenset(out), native)
+
+    top_level = dist.read_text("top_level.txt")
+    if top_level:
+        # Without a file list, only the loaded modules can tell about native code
+        return _InstalledModules(frozenset(f"{pkg}.*" for pkg in top_level.split() if pkg), False)
+    return None
+
+
+def _is_extension_module(module) -> bool:
+    spec = getattr(module, "__spec__", None)
+    return isinstance(getattr(spec, "loader", None), ExtensionFileLoader)
+
+
+def _purge_modules(modules: FrozenSet[str]) -> bool:
+    """
+    Drop `modules` from `sys.modules`. Returns True if any of them was a
+    compiled extension: CPython keeps using an extension that was loaded
+    once (and Windows locks the file), so its new code needs a restart.
+    """
+    # Never unload Dirigo itself: loaded plugins must keep subclassing the same Device
+    protected = Device.__module__.split(".", 1)[0]
+    exact = {m for m in modules if not m.endswith(".*")}
+    prefixes = tuple(m[:-2] for m in modules if m.endswith(".*") and m[:-2] != protected)
+    native = False
+    for mod_name in list(sys.modules):
+        if mod_name in exact or any(mod_name == p or mod_name.startswith(p + ".") for p in prefixes):
+            native = _is_extension_module(sys.modules.pop(mod_name)) or native
+    return native
+
+
+def invalidate_device_classes(keys: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    """
+    Forget the loaded classes for the given (group, name) keys, e.g. after the
+    providing distribution was upgraded or removed.
+
+    Every module installed by the providing distribution (as recorded when the
+    class was loaded) is dropped from `sys.modules`, so the next
+    `load_device_class` imports the new code and none of the old helpers.
+
+    Returns:
+        Keys that need a restart to be sure the new code is used: those whose
+        distribution did not record its modules (only the class's own package
+        could be unloaded), and those whose distribution ships compiled
+        extension modules, which cannot be reloaded in a running process.
+    """
+    needs_restart: Set[Tuple[str, str]] = set()
+    for key in keys:
+        cls = _device_class_cache.pop(key, None)
+        installed = _device_class_modules.pop(key, None)
+        if cls is None:
+            continue
+        if installed is None:
+            needs_restart.add(key)
+            modules = frozenset({cls.__module__ + ".*"})
+        else:
+            modules = installed.names
+            if installed.native:
+                needs_restart.add(key)
+        if _purge_modules(modules | {cls.__module__}):
+            needs_restart.add(key)
+    return needs_restart
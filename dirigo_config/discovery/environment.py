@@ -0,0 +1,253 @@
+import os
+import queue
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from importlib.metadata import PackageNotFoundError, distribution, distributions
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from dirigo_config.discovery.devices import DIRIGO_DEVICE_PREFIX
+
+
+# (group, entry point name), e.g. ("dirigo.devices.digitizers", "alazar")
+EntryPointKey = Tuple[str, str]
+
+_METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def normalize_dist_name(name: str) -> str:
+    """
+    Normalize a distribution name so that e.g. 'Dirigo-Alazar', 'dirigo_alazar'
+    and 'dirigo.alazar' compare equal.
+    """
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+def _dist_name_from_dir(dirname: str) -> str:
+    # "dirigo_alazar-0.2.0.dist-info" -> "dirigo_alazar"
+    stem = dirname.rsplit(".", 1)[0]
+    return normalize_dist_name(stem.split("-", 1)[0])
+
+
+@dataclass(frozen=True)
+class DistributionStamp:
+    name: str       # normalized distribution name
+    path: str       # metadata directory (*.dist-info / *.egg-info)
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class EnvironmentChanges:
+    added: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def all(self) -> Set[str]:
+        return self.added | self.removed | self.changed
+
+
+def _stat_mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _scan_directory(path: str) -> Dict[str, DistributionStamp]:
+    out: Dict[str, DistributionStamp] = {}
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return out
+
+    for entry in entries:
+        if not entry.name.endswith(_METADATA_SUFFIXES):
+            continue
+        name = _dist_name_from_dir(entry.name)
+        if name in out:
+            continue
+        # pip rewrites METADATA/RECORD on every (re)install, so the newest of the
+        # directory and its METADATA file is a good change indicator.
+        mtime = max(
+            _stat_mtime_ns(entry.path),
+            _stat_mtime_ns(os.path.join(entry.path, "METADATA")),
+            _stat_mtime_ns(os.path.join(entry.path, "PKG-INFO")),
+        )
+        out[name] = DistributionStamp(name=name, path=entry.path, mtime_ns=mtime)
+    return out
+
+
+class EnvironmentSnapshotter:
+    """
+    Takes cheap snapshots of the installed distributions on `sys.path`.
+
+    Each sys.path directory is only rescanned when its own mtime changes, which
+    is the case whenever pip adds, removes or replaces a dist-info directory.
+    """
+
+    def __init__(self, paths: Optional[Iterable[str]] = None) -> None:
+        self._paths = list(paths) if paths is not None else None
+        self._dir_cache: Dict[str, Tuple[int, Dict[str, DistributionStamp]]] = {}
+
+    def _search_paths(self) -> List[str]:
+        paths = self._paths if self._paths is not None else sys.path
+        return [p for p in paths if p and os.path.isdir(p)]
+
+    def snapshot(self) -> Dict[str, DistributionStamp]:
+        """
+        Return normalized distribution name -> stamp. As with importlib.metadata,
+        the first occurrence along the search path wins.
+        """
+        out: Dict[str, DistributionStamp] = {}
+        for path in self._search_paths():
+            mtime = _stat_mtime_ns(path)
+            cached = self._dir_cache.get(path)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, _scan_directory(path))
+                self._dir_cache[path] = cached
+            for name, stamp in cached[1].items():
+                out.setdefault(name, stamp)
+        return out
+
+
+def diff_snapshots(
+    old: Dict[str, DistributionStamp],
+    new: Dict[str, DistributionStamp],
+) -> EnvironmentChanges:
+    """Compare two snapshots produced by `EnvironmentSnapshotter.snapshot`."""
+    added = set(new) - set(old)
+    removed = set(old) - set(new)
+    changed = {name for name in set(old) & set(new) if old[name] != new[name]}
+    return EnvironmentChanges(added=added, removed=removed, changed=changed)
+
+
+class PluginIndex:
+    """
+    Dirigo device entry points indexed by the distribution that provides them.
+
+    Keeping the index per distribution lets the configurator re-read only the
+    distributions that were added, removed or upgraded instead of rescanning
+    the whole environment.
+    """
+
+    def __init__(self) -> None:
+        self._by_dist: Dict[str, List[EntryPointKey]] = {}
+
+    @staticmethod
+    def _device_entry_points(dist) -> List[EntryPointKey]:
+        return sorted(
+            (ep.group, ep.name)
+            for ep in dist.entry_points
+            if ep.group.startswith(DIRIGO_DEVICE_PREFIX)
+        )
+
+    def rebuild(self) -> None:
+        """Index every installed distribution."""
+        self._by_dist = {}
+        for dist in distributions():
+            name = normalize_dist_name(dist.metadata["Name"] or "")
+            if not name or name in self._by_dist:
+                continue
+            self._by_dist[name] = self._device_entry_points(dist)
+
+    def refresh(self, dist_names: Iterable[str]) -> Set[EntryPointKey]:
+        """
+        Re-index only `dist_names`.
+
+        Returns:
+            Entry point keys provided by those distributions before or after the
+            refresh, i.e. everything whose loaded class may now be stale.
+        """
+        affected: Set[EntryPointKey] = set()
+        for name in {normalize_dist_name(n) for n in dist_names}:
+            affected.update(self._by_dist.pop(name, []))
+            try:
+                dist = distribution(name)
+            except PackageNotFoundError:
+                continue
+            keys = self._device_entry_points(dist)
+            self._by_dist[name] = keys
+            affected.update(keys)
+        return affected
+
+    def distributions(self) -> List[str]:
+        """Normalized names of the distributions providing device entry points."""
+        return sorted(name for name, keys in self._by_dist.items() if keys)
+
+    def kind_to_group(self) -> Dict[str, str]:
+        """Same shape as `discover_kinds_and_groups`, computed from the index."""
+        groups = {group for keys in self._by_dist.values() for group, _ in keys}
+        return {g[len(DIRIGO_DEVICE_PREFIX):]: g for g in sorted(groups)}
+
+    def entry_point_names(self, group: str) -> List[str]:
+        return sorted({n for keys in self._by_dist.values() for g, n in keys if g == group})
+
+
+class EnvironmentWatcher:
+    """
+    Polls the Python environment on a background thread.
+
+    Detected changes are queued rather than delivered through a callback because
+    Tk widgets may only be touched from the main thread: the UI drains the queue
+    with `poll()` from an `after()` loop.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = 2.0,
+        snapshotter: Optional[EnvironmentSnapshotter] = None,
+    ) -> None:
+        self.interval_s = interval_s
+        self._snapshotter = snapshotter or EnvironmentSnapshotter()
+        self._changes: "queue.Queue[EnvironmentChanges]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # Baseline is taken synchronously so nothing installed after start() is missed
+        baseline = self._snapshotter.snapshot()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(baseline,),
+            name="dirigo-config-env-watcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1.0)
+            self._thread = None
+
+    def _run(self, previous: Dict[str, DistributionStamp]) -> None:
+        while not self._stop.wait(self.interval_s):
+            current = self._snapshotter.snapshot()
+            changes = diff_snapshots(previous, current)
+            if changes:
+                self._changes.put(changes)
+            previous = current
+
+    def poll(self) -> Optional[EnvironmentChanges]:
+        """Return all changes detected since the last call, merged, or None."""
+        merged: Optional[EnvironmentChanges] = None
+        while True:
+            try:
+                changes = self._changes.get_nowait()
+            except queue.Empty:
+                return merged
+            if merged is None:
+                merged = changes
+            else:
+                merged = EnvironmentChanges(
+                    added=merged.added | changes.added,
+                    removed=merged.removed | changes.removed,
+                    changed=merged.changed | changes.changed,
+                )
@@ -0,0 +1,301 @@
+import bisect
+import json
+import re
+from dataclasses import dataclass, replace
+from importlib.metadata import PackageNotFoundError, distribution
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from dirigo_config.discovery.devices import DIRIGO_DEVICE_PREFIX
+from dirigo_config.discovery.environment import EntryPointKey, normalize_dist_name
+
+
+@dataclass(frozen=True)
+class SearchEntry:
+    kind: str
+    group: str
+    name: str               # entry point name
+    title: Optional[str]    # Device.title, None until the class has been loaded once
+    vendor: str
+    distribution: str
+
+    @property
+    def key(self) -> EntryPointKey:
+        return (self.group, self.name)
+
+    @property
+    def label(self) -> str:
+        return self.title or self.name
+
+
+# Match weights: a hit on the entry point name or title ranks above a hit on
+# the kind, vendor or distribution.
+_FIELD_WEIGHTS = {"name": 3.0, "title": 3.0, "kind": 2.0, "vendor": 1.0, "distribution": 1.0}
+_FUZZY_WEIGHT = 0.5
+_FUZZY_MAX_QUERY = 32  # longer queries are truncated for fuzzy matching
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _fuzzy_match(fields: Tuple[str, ...], chars: str) -> bool:
+    """
+    True if `chars` occur in order within one of `fields`, starting at the
+    beginning of a word. Linear in the field length: matching greedily from
+    the first word start holding chars[0] is enough, since any later start
+    leaves a subset of the remaining text.
+    """
+    first = chars[0]
+    for text in fields:
+        i = text.find(first)
+        while i > 0 and text[i - 1].isalnum():
+            i = text.find(first, i + 1)
+        if i < 0:
+            continue
+        for c in chars[1:]:
+            i = text.find(c, i + 1)
+            if i < 0:
+                break
+        else:
+            return True
+    return False
+
+
+def _vendor_from_metadata(metadata) -> str:
+    vendor = metadata["Author"] or metadata["Maintainer"] or ""
+    if not vendor:
+        # "Author-email: Jane Doe <jane@example.com>" -> "Jane Doe"
+        email = metadata["Author-email"] or ""
+        vendor = email.split("<", 1)[0].strip().strip('"')
+    return vendor
+
+
+def entries_for_distribution(
+    dist_name: str,
+    titles: Optional[Dict[EntryPointKey, str]] = None,
+) -> List[SearchEntry]:
+    """
+    Build search entries for every Dirigo device entry point of `dist_name`
+    from its metadata alone, i.e. without importing any plugin code.
+    """
+    try:
+        dist = distribution(dist_name)
+    except PackageNotFoundError:
+        return []
+
+    titles = titles or {}
+    vendor = _vendor_from_metadata(dist.metadata)
+    out: List[SearchEntry] = []
+    for ep in dist.entry_points:
+        if not ep.group.startswith(DIRIGO_DEVICE_PREFIX):
+            continue
+        out.append(SearchEntry(
+            kind=ep.group[len(DIRIGO_DEVICE_PREFIX):],
+            group=ep.group,
+            name=ep.name,
+            title=titles.get((ep.group, ep.name)),
+            vendor=vendor,
+            distribution=dist.metadata["Name"],
+        ))
+    return out
+
+
+class SearchIndex:
+    """
+    Type-ahead index over kind, entry point name, title, vendor and distribution.
+
+    Every query term must match the start of a token of an entry (prefix
+    search, done by bisecting a sorted vocabulary). If that yields fewer than
+    `limit` results, entries whose text contains the query characters in order
+    are added with a lower score (fuzzy search). A fuzzy match has to start at
+    the beginning of a word and stay within one field. Every entry is
+    considered; a character-set check rules out most of them cheaply.
+    """
+
+    def __init__(self, entries: Iterable[SearchEntry] = ()) -> None:
+        self._entries: Dict[EntryPointKey, SearchEntry] = {}
+        self._by_dist: Dict[str, Set[EntryPointKey]] = {}
+        # key -> (lowercase fields, every character in them)
+        self._haystacks: Dict[EntryPointKey, Tuple[Tuple[str, ...], FrozenSet[str]]] = {}
+        # token -> {key: best field weight}
+        self._postings: Dict[str, Dict[EntryPointKey, float]] = {}
+        self._vocab: List[str] = []  # sorted tokens
+        for entry in entries:
+            self._add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: EntryPointKey) -> Optional[SearchEntry]:
+        return self._entries.get(key)
+
+    def _add(self, entry: SearchEntry) -> None:
+        key = entry.key
+        self._entries[key] = entry
+        self._by_dist.setdefault(normalize_dist_name(entry.distribution), set()).add(key)
+
+        fields = {
+            "name": entry.name,
+            "title": entry.title or "",
+            "kind": entry.kind,
+            "vendor": entry.vendor,
+            "distribution": entry.distribution,
+        }
+        texts = tuple(v.lower() for v in fields.values() if v)
+        self._haystacks[key] = (texts, frozenset("".join(texts)))
+        for field, text in fields.items():
+            for token in _tokenize(text):
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    bisect.insort(self._vocab, token)
+                posting[key] = max(posting.get(key, 0.0), _FIELD_WEIGHTS[field])
+
+    def _remove(self, key: EntryPointKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        dist_keys = self._by_dist.get(normalize_dist_name(entry.distribution))
+        if dist_keys is not None:
+            dist_keys.discard(key)
+        self._haystacks.pop(key, None)
+        for token in set(_tokenize(" ".join([
+            entry.name, entry.title or "", entry.kind, entry.vendor, entry.distribution
+        ]))):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(key, None)
+            if not posting:
+                del self._postings[token]
+                i = bisect.bisect_left(self._vocab, token)
+                if i < len(self._vocab) and self._vocab[i] == token:
+                    del self._vocab[i]
+
+    def update_distribution(self, dist_name: str, entries: Iterable[SearchEntry]) -> None:
+        """Replace everything indexed for `dist_name` (e.g. after an upgrade)."""
+        for key in list(self._by_dist.pop(normalize_dist_name(dist_name), ())):
+            self._remove(key)
+        for entry in entries:
+            self._add(entry)
+
+    def set_title(self, key: EntryPointKey, title: str) -> None:
+        entry = self._entries.get(key)
+        if entry is None or entry.title == title:
+            return
+        self._remove(key)
+        self._add(replace(entry, title=title))
+
+    def _prefix_matches(self, term: str) -> Dict[EntryPointKey, float]:
+        out: Dict[EntryPointKey, float] = {}
+        i = bisect.bisect_left(self._vocab, term)
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            token = self._vocab[i]
+            # Whole-token matches rank above prefix matches
+            bonus = 1.0 if token == term else 0.0
+            for key, weight in self._postings[token].items():
+                out[key] = max(out.get(key, 0.0), weight + bonus)
+            i += 1
+        return out
+
+    def search(self, query: str, limit: int = 10) -> List[SearchEntry]:
+        terms = _tokenize(query)
+        if not terms:
+            return []
+
+        scores: Optional[Dict[EntryPointKey, float]] = None
+        for term in terms:
+            matches = self._prefix_matches(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {k: s + matches[k] for k, s in scores.items() if k in matches}
+            if not scores:
+                break
+        scores = scores or {}
+
+        if len(scores) < limit:
+            chars = "".join(terms)[:_FUZZY_MAX_QUERY]
+            needed = set(chars)
+            for key, (fields, charset) in self._haystacks.items():
+                if key in scores or not needed <= charset:
+                    continue
+                if _fuzzy_match(fields, chars):
+                    scores[key] = _FUZZY_WEIGHT
+                    if len(scores) >= limit:
+                        break
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda kv: (-kv[1], len(self._entries[kv[0]].label), kv[0]),
+        )
+        return [self._entries[k] for k, _ in ranked[:limit]]
+
+
+class TitleCache:
+    """
+    Device titles persisted per distribution version. Titles are recorded
+    whenever the UI loads a device class anyway; plugin code is never imported
+    just to fill the search index.
+
+    `titles_for` looks up the installed version and remembers it, so call it
+    again for every distribution that changed; `set_title` only uses the
+    remembered version. `set_title` does not write the file, call `save`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._dist_keys: Dict[str, Optional[str]] = {}  # normalized name -> "name==version"
+        self._dirty = False
+        try:
+            self._data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._data = {}
+
+    def _lookup_dist_key(self, dist_name: str) -> Optional[str]:
+        name = normalize_dist_name(dist_name)
+        try:
+            dist_key: Optional[str] = f"{name}=={distribution(dist_name).version}"
+        except PackageNotFoundError:
+            dist_key = None
+        self._dist_keys[name] = dist_key
+        return dist_key
+
+    def titles_for(self, dist_name: str) -> Dict[EntryPointKey, str]:
+        dist_key = self._lookup_dist_key(dist_name)
+        stored = self._data.get(dist_key, {}) if dist_key else {}
+        return {tuple(k.split(":", 1)): v for k, v in stored.items()}  # type: ignore[misc]
+
+    def set_title(self, dist_name: str, key: EntryPointKey, title: str) -> None:
+        name = normalize_dist_name(dist_name)
+        if name in self._dist_keys:
+            dist_key = self._dist_keys[name]
+        else:
+            dist_key = self._lookup_dist_key(dist_name)
+        if dist_key is None:
+            return
+        self._data.setdefault(dist_key, {})[f"{key[0]}:{key[1]}"] = title
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._data, indent=1), encoding="utf-8")
+        except OSError:
+            return
+        self._dirty = False
+
+
+def build_search_index(dist_names: Iterable[str], title_cache: TitleCache) -> SearchIndex:
+    index = SearchIndex()
+    for dist_name in dist_names:
+        index.update_distribution(
+            dist_name, entries_for_distribution(dist_name, title_cache.titles_for(dist_name))
+        )
+    return index
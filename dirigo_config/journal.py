@@ -0,0 +1,279 @@
+import json
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
+
+from dirigo_config.state import ConfigState, event_key
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+# One journal per configurator process, e.g. "dirigo-config.journal.1234.jsonl"
+JOURNAL_PREFIX = "dirigo-config.journal"
+JOURNAL_SUFFIX = ".jsonl"
+
+
+def journal_path_for_process(directory: Path) -> Path:
+    return directory / f"{JOURNAL_PREFIX}.{os.getpid()}{JOURNAL_SUFFIX}"
+
+
+class _FileLock:
+    """
+    Exclusive, non-blocking advisory lock on `path`. The OS drops it when the
+    holding process dies, which is how a crashed session's journal is told
+    apart from one that is still in use.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        try:
+            f = open(self.path, "a+", encoding="utf-8")
+        except OSError:
+            return False
+        try:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        # Remove the file while still holding the lock, so nobody can lock it
+        # in between; Windows cannot remove open files, so retry after closing.
+        try:
+            self.path.unlink()
+            removed = True
+        except OSError:
+            removed = False
+        # Closing the file releases the lock
+        self._file.close()
+        self._file = None
+        if not removed:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def _lock_for(journal_path: Path) -> _FileLock:
+    return _FileLock(journal_path.with_name(journal_path.name + ".lock"))
+
+
+def load_journal(path: Path) -> ConfigState:
+    """
+    Replay the journal at `path`. A torn final line, left by a crash mid-write,
+    is ignored.
+    """
+    state = ConfigState()
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return state
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        state = state.apply(event)
+    return state
+
+
+class OrphanedJournal:
+    """
+    A journal left behind by a configurator that did not shut down cleanly.
+    Holds the journal's lock, so no other instance restores or removes it.
+    """
+
+    def __init__(self, path: Path, lock: _FileLock) -> None:
+        self.path = path
+        self._lock = lock
+
+    def load(self) -> ConfigState:
+        return load_journal(self.path)
+
+    def discard(self) -> None:
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+        self._lock.release()
+
+
+def claim_orphaned_journals(directory: Path) -> List[OrphanedJournal]:
+    """
+    Journals in `directory` whose configurator is no longer running, newest
+    first. Journals of running instances are skipped.
+    """
+    found = []
+    for path in directory.glob(f"{JOURNAL_PREFIX}*{JOURNAL_SUFFIX}"):
+        lock = _lock_for(path)
+        if not lock.acquire():
+            continue
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            lock.release()
+            continue
+        found.append((mtime, OrphanedJournal(path, lock)))
+    found.sort(key=lambda item: item[0], reverse=True)
+    return [orphan for _, orphan in found]
+
+
+class AutosaveJournal:
+    """
+    Append-only journal of configuration edits.
+
+    `record()` only enqueues, so it is cheap enough to call on every keystroke.
+    A background thread appends queued events in batches, coalescing
+    consecutive edits of the same field, and compacts the file once it has
+    grown by `compact_every` lines.
+
+    Write errors (disk full, file locked, ...) do not stop the writer: the
+    error is exposed through `error` for the UI to show, and the next attempt
+    rewrites the whole journal from the in-memory state, so no edit is lost
+    and no torn line is left in the middle of the file.
+
+    While open, the journal holds a lock (see `claim_orphaned_journals`), so
+    give every process its own path, e.g. `journal_path_for_process`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        flush_interval_s: float = 0.5,
+        compact_every: int = 1000,
+        state: Optional[ConfigState] = None,
+    ) -> None:
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self.compact_every = compact_every
+
+        self._state = state or ConfigState()
+        self._lines_since_compact = 0
+        self._needs_compact = True
+        self.error: Optional[OSError] = None
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = _lock_for(path)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # Start from a compact file holding exactly the (possibly restored) state
+        self._write([])
+        self._thread = threading.Thread(
+            target=self._run, name="dirigo-config-journal", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, event: Dict[str, Any]) -> None:
+        self._queue.put(event)
+
+    def close(self, *, discard: bool = False) -> None:
+        """
+        Flush pending events and stop the writer. With `discard`, the journal
+        file is removed, e.g. on a clean shutdown.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if discard:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+        self._lock.release()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            try:
+                first = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                if self._needs_compact:
+                    self._write([])  # retry after an earlier write error
+                continue
+            items = [first]
+            # Drain whatever else has queued up while we waited
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for event in items:
+                if event is None:
+                    stopping = True
+                    continue
+                if batch and event_key(batch[-1]) == event_key(event) and event["op"] != "add_device":
+                    batch[-1] = event
+                else:
+                    batch.append(event)
+
+            if batch or self._needs_compact:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        # The state always includes every event, so a compaction persists
+        # whatever an earlier failed write could not.
+        for event in batch:
+            self._state = self._state.apply(event)
+
+        try:
+            if self._needs_compact or self._lines_since_compact + len(batch) >= self.compact_every:
+                self._compact()
+            else:
+                self._append(batch)
+        except OSError as e:
+            self._needs_compact = True
+            self.error = e
+        else:
+            self._needs_compact = False
+            self.error = None
+
+    def _append(self, batch: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, default=str) + "\n" for e in batch))
+            f.flush()
+            os.fsync(f.fileno())
+        self._lines_since_compact += len(batch)
+
+    def _compact(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Taken before the file first exists, so it never looks orphaned
+        self._lock.acquire()
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, default=str) + "\n" for e in self._state.to_events()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._lines_since_compact = 0
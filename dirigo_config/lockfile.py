@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass
+from importlib.metadata import PathDistribution
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from dirigo_config.discovery.devices import (
+    DIRIGO_DEVICE_PREFIX, EntryPointNotFound, _select_entry_point
+)
+from dirigo_config.discovery.environment import (
+    EnvironmentSnapshotter, normalize_dist_name
+)
+from dirigo_config.provenance import generated_by_string
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+
+LOCKFILE_SUFFIX = ".lock.toml"
+
+# Files listing what a distribution installed, in order of preference
+_RECORD_FILES = ("RECORD", "installed-files.txt", "SOURCES.txt")
+
+
+class LockfileMismatchError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class LockedEntryPoint:
+    group: str
+    name: str
+    distribution: str
+    version: str
+    record_hash: str
+
+
+@dataclass(frozen=True)
+class LockMismatch:
+    locked: LockedEntryPoint
+    problem: str
+
+    def __str__(self) -> str:
+        return f"{self.locked.group}:{self.locked.name} ({self.locked.distribution}): {self.problem}"
+
+
+@dataclass(frozen=True)
+class _DistInfo:
+    version: str
+    record_hash: str
+    device_entry_points: FrozenSet[Tuple[str, str]]
+
+
+def lockfile_path_for(config_path: Path) -> Path:
+    """
+    Example:
+        "my_system.system.toml" -> "my_system.system.lock.toml"
+    """
+    stem = config_path.name.removesuffix(".toml")
+    return config_path.with_name(stem + LOCKFILE_SUFFIX)
+
+
+def _record_hash(dist) -> str:
+    for fname in _RECORD_FILES:
+        text = dist.read_text(fname)
+        if text is not None:
+            return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return ""
+
+
+def _read_dist_info(dist) -> _DistInfo:
+    return _DistInfo(
+        version=dist.version,
+        record_hash=_record_hash(dist),
+        device_entry_points=frozenset(
+            (ep.group, ep.name)
+            for ep in dist.entry_points
+            if ep.group.startswith(DIRIGO_DEVICE_PREFIX)
+        ),
+    )
+
+
+def lock_entry_point(group: str, name: str) -> LockedEntryPoint:
+    """
+    Record the distribution currently providing the entry point (group, name).
+    """
+    dist = _select_entry_point(group, name).dist
+    if dist is None:
+        raise EntryPointNotFound(
+            f"Entry point {group!r}:{name!r} is not provided by an installed distribution."
+        )
+
+    info = _read_dist_info(dist)
+    return LockedEntryPoint(
+        group=group,
+        name=name,
+        distribution=dist.metadata["Name"],
+        version=info.version,
+        record_hash=info.record_hash,
+    )
+
+
+def _toml_str(s: str) -> str:
+    # JSON string escapes are valid TOML basic-string escapes
+    return json.dumps(s, ensure_ascii=False)
+
+
+def lockfile_to_toml(locked: Iterable[LockedEntryPoint]) -> str:
+    lines = [f"generated_by = {_toml_str(generated_by_string())}"]
+    for lep in sorted(set(locked), key=lambda l: (l.group, l.name)):
+        lines += [
+            "",
+            "[[entry_points]]",
+            f"group = {_toml_str(lep.group)}",
+            f"name = {_toml_str(lep.name)}",
+            f"distribution = {_toml_str(lep.distribution)}",
+            f"version = {_toml_str(lep.version)}",
+            f"record_hash = {_toml_str(lep.record_hash)}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_lockfile(path: Path, locked: Iterable[LockedEntryPoint]) -> None:
+    path.write_text(lockfile_to_toml(locked), encoding="utf-8")
+
+
+def write_config_with_lockfile(
+    config_path: Path,
+    config_text: str,
+    locked: Iterable[LockedEntryPoint],
+) -> None:
+    """
+    Write a system config and its lockfile (see `lockfile_path_for`).
+
+    Both are written to temporary files first and then moved into place,
+    lockfile first. If anything fails, the previously exported config is never
+    left next to a lockfile it was not exported with.
+    """
+    targets = [
+        (lockfile_path_for(config_path), lockfile_to_toml(locked)),
+        (config_path, config_text),
+    ]
+    tmps = [path.with_name(path.name + ".tmp") for path, _ in targets]
+    try:
+        for (_, text), tmp in zip(targets, tmps):
+            tmp.write_text(text, encoding="utf-8")
+        for (path, _), tmp in zip(targets, tmps):
+            os.replace(tmp, path)
+    finally:
+        for tmp in tmps:
+            try:
+                tmp.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# path -> (mtime_ns, parsed entries)
+_lockfile_cache: Dict[str, Tuple[int, List[LockedEntryPoint]]] = {}
+
+
+def read_lockfile(path: Path) -> List[LockedEntryPoint]:
+    """Parse a lockfile written by `write_lockfile`. Results are cached by mtime."""
+    key = os.fspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    cached = _lockfile_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    data = tomllib.loads(Path(key).read_text(encoding="utf-8"))
+    locked = [
+        LockedEntryPoint(
+            group=item["group"],
+            name=item["name"],
+            distribution=item["distribution"],
+            version=item["version"],
+            record_hash=item.get("record_hash", ""),
+        )
+        for item in data.get("entry_points", [])
+    ]
+    _lockfile_cache[key] = (mtime, locked)
+    return locked
+
+
+class LockVerifier:
+    """
+    Checks lockfiles against the running environment.
+
+    Distribution metadata is cached per dist-info directory and mtime, so after
+    the first call a verification costs one stat per sys.path directory plus a
+    dictionary lookup per locked entry point. Intended to be kept alive and
+    called on every acquisition start.
+    """
+
+    def __init__(self, snapshotter: Optional[EnvironmentSnapshotter] = None) -> None:
+        self._snapshotter = snapshotter or EnvironmentSnapshotter()
+        self._dist_cache: Dict[Tuple[str, int], _DistInfo] = {}
+
+    def _dist_info(self, path: str, mtime_ns: int) -> _DistInfo:
+        key = (path, mtime_ns)
+        info = self._dist_cache.get(key)
+        if info is None:
+            info = _read_dist_info(PathDistribution(Path(path)))
+            self._dist_cache[key] = info
+        return info
+
+    def verify(self, locked: Iterable[LockedEntryPoint]) -> List[LockMismatch]:
+        """Return every difference between `locked` and the current environment."""
+        installed = self._snapshotter.snapshot()
+
+        mismatches: List[LockMismatch] = []
+        for lep in locked:
+            stamp = installed.get(normalize_dist_name(lep.distribution))
+            if stamp is None:
+                mismatches.append(LockMismatch(lep, "distribution is not installed"))
+                continue
+
+            info = self._dist_info(stamp.path, stamp.mtime_ns)
+            if (lep.group, lep.name) not in info.device_entry_points:
+                mismatches.append(LockMismatch(lep, "entry point is no longer provided"))
+            if info.version != lep.version:
+                mismatches.append(
+                    LockMismatch(lep, f"version {info.version} installed, {lep.version} locked")
+                )
+            elif lep.record_hash and info.record_hash != lep.record_hash:
+                mismatches.append(
+                    LockMismatch(lep, "installed files differ from the locked build")
+                )
+        return mismatches
+
+
+_default_verifier: Optional[LockVerifier] = None
+
+
+def verify_lockfile(path: Path) -> List[LockMismatch]:
+    """
+    Check the lockfile at `path` against the current environment.
+
+    Uses a module-level `LockVerifier` so repeated calls hit its caches.
+    """
+    global _default_verifier
+    if _default_verifier is None:
+        _default_verifier = LockVerifier()
+    return _default_verifier.verify(read_lockfile(path))
+
+
+def check_lockfile(path: Path) -> None:
+    """Like `verify_lockfile`, but raise `LockfileMismatchError` on any difference."""
+    mismatches = verify_lockfile(path)
+    if mismatches:
+        raise LockfileMismatchError(
+            f"Plugin environment does not match {path.name}:\n"
+            + "\n".join(f"  - {m}" for m in mismatches)
+        )
@@ -0,0 +1,259 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+
+# Edit events, shared by the autosave journal and the undo history:
+#   {"op": "meta", "field": f, "value": v}
+#   {"op": "add_device", "device": n}
+#   {"op": "device", "device": n, "field": "name" | "kind" | "entry_point" | "config.<f>", "value": v}
+#   {"op": "device", "device": n, "field": "config.<f>", "unset": True}   (back to the form default)
+CONFIG_FIELD_PREFIX = "config."
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+def event_key(event: Dict[str, Any]) -> tuple:
+    """Events with equal keys edit the same thing, so the later one supersedes."""
+    return (event.get("op"), event.get("device"), event.get("field"))
+
+
+def _with(mapping: Mapping, key: Any, value: Any) -> Mapping:
+    # Shallow copy: values (device states, field values) are shared, not copied
+    out = dict(mapping)
+    out[key] = value
+    return MappingProxyType(out)
+
+
+@dataclass(frozen=True)
+class DeviceState:
+    name: Optional[str] = None
+    kind: Optional[str] = None
+    entry_point: Optional[str] = None
+    config: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)
+
+
+_EMPTY_DEVICE = DeviceState()
+
+
+@dataclass(frozen=True)
+class ConfigState:
+    """
+    Immutable snapshot of a configuration session, independent of the widgets.
+
+    `apply` returns a new snapshot that shares every unchanged device state and
+    field value with this one; an edit that changes nothing returns `self`.
+    Comparing device states by identity is therefore enough to find what an
+    edit touched.
+    """
+    meta: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)
+    devices: Mapping[int, DeviceState] = field(default_factory=lambda: _EMPTY)  # type: ignore[assignment]
+
+    def apply(self, event: Dict[str, Any]) -> "ConfigState":
+        op = event.get("op")
+        if op == "meta":
+            f, value = event["field"], event["value"]
+            if f in self.meta and self.meta[f] == value:
+                return self
+            return replace(self, meta=_with(self.meta, f, value))
+
+        if op == "add_device":
+            n = int(event["device"])
+            if n in self.devices:
+                return self
+            return replace(self, devices=_with(self.devices, n, _EMPTY_DEVICE))
+
+        if op == "device":
+            n = int(event["device"])
+            dev = self.devices.get(n, _EMPTY_DEVICE)
+            if event.get("unset"):
+                new_dev = _unset_device_config(dev, event["field"])
+            else:
+                new_dev = _apply_device(dev, event["field"], event["value"])
+            if new_dev is dev and n in self.devices:
+                return self
+            return replace(self, devices=_with(self.devices, n, new_dev))
+
+        return self
+
+    def is_empty(self) -> bool:
+        return not (self.meta or self.devices)
+
+    def changed_devices(self, other: "ConfigState") -> Set[int]:
+        """Device numbers whose state differs between `self` and `other`."""
+        numbers = set(self.devices) | set(other.devices)
+        return {n for n in numbers if self.devices.get(n) is not other.devices.get(n)}
+
+    def changed_meta(self, other: "ConfigState") -> Set[str]:
+        if self.meta is other.meta:
+            return set()
+        fields = set(self.meta) | set(other.meta)
+        return {f for f in fields if self.meta.get(f) != other.meta.get(f)}
+
+    def to_events(self) -> List[Dict[str, Any]]:
+        """Shortest event sequence that replays to this state."""
+        return ConfigState().events_to(self)
+
+    def events_to(self, other: "ConfigState") -> List[Dict[str, Any]]:
+        """Events that turn `self` into `other`."""
+        events: List[Dict[str, Any]] = [
+            {"op": "meta", "field": f, "value": other.meta.get(f)}
+            for f in sorted(self.changed_meta(other))
+        ]
+        for n in sorted(self.changed_devices(other)):
+            old = self.devices.get(n)
+            new = other.devices.get(n, _EMPTY_DEVICE)
+            if old is None:
+                events.append({"op": "add_device", "device": n})
+                old = _EMPTY_DEVICE
+            events.extend({"op": "device", "device": n, **e} for e in _device_events(old, new))
+        return events
+
+
+def _apply_device(dev: DeviceState, f: str, value: Any) -> DeviceState:
+    if f.startswith(CONFIG_FIELD_PREFIX):
+        name = f[len(CONFIG_FIELD_PREFIX):]
+        if name in dev.config and dev.config[name] == value:
+            return dev
+        return replace(dev, config=_with(dev.config, name, value))
+    if f == "name":
+        return dev if dev.name == value else replace(dev, name=value)
+    if f == "kind":
+        # Mirrors the UI: a new kind clears the entry point and its config form
+        if dev.kind == value:
+            return dev
+        return replace(dev, kind=value, entry_point=None, config=_EMPTY)
+    if f == "entry_point":
+        if dev.entry_point == value:
+            return dev
+        return replace(dev, entry_point=value, config=_EMPTY)
+    return dev
+
+
+def _unset_device_config(dev: DeviceState, f: str) -> DeviceState:
+    name = f[len(CONFIG_FIELD_PREFIX):]
+    if not f.startswith(CONFIG_FIELD_PREFIX) or name not in dev.config:
+        return dev
+    config = dict(dev.config)
+    del config[name]
+    return replace(dev, config=MappingProxyType(config))
+
+
+def _device_events(old: DeviceState, new: DeviceState) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    if old.name != new.name:
+        events.append({"field": "name", "value": new.name})
+
+    config_base = old.config
+    if old.kind != new.kind:
+        events.append({"field": "kind", "value": new.kind})
+        config_base = _EMPTY
+        if new.entry_point is not None:
+            events.append({"field": "entry_point", "value": new.entry_point})
+    elif old.entry_point != new.entry_point:
+        events.append({"field": "entry_point", "value": new.entry_point})
+        config_base = _EMPTY
+
+    for f in sorted(set(config_base) | set(new.config)):
+        if f not in new.config:
+            events.append({"field": CONFIG_FIELD_PREFIX + f, "unset": True})
+        elif f not in config_base or config_base[f] != new.config[f]:
+            events.append({"field": CONFIG_FIELD_PREFIX + f, "value": new.config[f]})
+    return events
+
+
+class History:
+    """
+    Bounded undo/redo history of `ConfigState` snapshots.
+
+    Repeated edits of the same field within `coalesce_s` (i.e. typing) form a
+    single undo step, as do all edits recorded inside `grouped()`.
+
+    Adding a device is not an undo step: device cards cannot be removed, so
+    the new device is added to every snapshot, past and future alike.
+    """
+
+    def __init__(
+        self,
+        initial: Optional[ConfigState] = None,
+        *,
+        max_length: int = 200,
+        coalesce_s: float = 1.0,
+    ) -> None:
+        self.current = initial or ConfigState()
+        self.coalesce_s = coalesce_s
+        self._undo: Deque[ConfigState] = deque(maxlen=max_length)
+        self._redo: Deque[ConfigState] = deque(maxlen=max_length)
+        self._last_key: Optional[tuple] = None
+        self._last_time = 0.0
+        self._group_depth = 0
+        self._group_started = False
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @contextmanager
+    def grouped(self) -> Iterator[None]:
+        """Record every edit made inside the block as a single undo step."""
+        self._group_depth += 1
+        try:
+            yield
+        finally:
+            self._group_depth -= 1
+            if not self._group_depth:
+                self._group_started = False
+                self._last_key = None
+
+    def record(self, event: Dict[str, Any]) -> ConfigState:
+        new = self.current.apply(event)
+        if new is self.current:
+            return new
+
+        if event.get("op") == "add_device":
+            self._undo = deque((s.apply(event) for s in self._undo), maxlen=self._undo.maxlen)
+            self._redo = deque((s.apply(event) for s in self._redo), maxlen=self._redo.maxlen)
+            self.current = new
+            return new
+
+        key = event_key(event)
+        now = time.monotonic()
+        coalesce = self._undo and (
+            self._group_started
+            or (key == self._last_key and now - self._last_time < self.coalesce_s)
+        )
+        if not coalesce:
+            self._undo.append(self.current)
+        if self._group_depth:
+            self._group_started = True
+        self._redo.clear()
+        self._last_key, self._last_time = key, now
+        self.current = new
+        return new
+
+    def undo(self) -> Optional[Tuple[ConfigState, ConfigState]]:
+        """Step back. Returns (state before, state after), or None."""
+        if not self._undo:
+            return None
+        old = self.current
+        self._redo.append(old)
+        self.current = self._undo.pop()
+        self._last_key = None
+        return old, self.current
+
+    def redo(self) -> Optional[Tuple[ConfigState, ConfigState]]:
+        """Step forward. Returns (state before, state after), or None."""
+        if not self._redo:
+            return None
+        old = self.current
+        self._undo.append(old)
+        self.current = self._redo.pop()
+        self._last_key = None
+        return old, self.current
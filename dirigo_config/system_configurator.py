@@ -1,13 +1,30 @@
+import importlib
 import re
+from tkinter import messagebox
 
 import customtkinter as ctk
 from dirigo.config.system_config import SystemMetadata, DeviceDef, SystemConfig
 from dirigo.components.io import config_path
 
 from dirigo_config.provenance import generated_by_string
-from dirigo_config.ui.forms.pydantic_form import build_form_from_model
+from dirigo_config.lockfile import LockedEntryPoint, lock_entry_point, write_config_with_lockfile
+from dirigo_config.journal import AutosaveJournal, claim_orphaned_journals, journal_path_for_process
+from dirigo_config.state import ConfigState, History
+from dirigo_config.ui.forms.pydantic_form import build_form_from_model, set_form_values, watch_form
 from dirigo_config.ui.forms.device_card import DeviceCard
-from dirigo_config.discovery.devices import discover_kinds_and_groups
+from dirigo_config.discovery.devices import (
+    invalidate_device_classes, EntryPointNotFound, EntryPointNotUnique
+)
+from dirigo_config.discovery.environment import EnvironmentWatcher, PluginIndex
+from dirigo_config.discovery.search import (
+    SearchEntry, TitleCache, build_search_index, entries_for_distribution
+)
+
+
+PLUGIN_POLL_MS = 1000  # how often the UI drains detected environment changes
+AUTOSAVE_POLL_MS = 1000  # how often the UI checks the journal writer for errors
+SEARCH_RESULTS = 8
+TITLE_CACHE_FILENAME = "dirigo-config.titles.json"
 
 
 
@@ -53,28 +70,102 @@ def main() -> None:
     # Create an instance with configurator provenance injected
     system_metadata = SystemMetadata()
 
-    meta_frame, meta_getters, _ = build_form_from_model(
+    meta_frame, meta_getters, meta_widgets = build_form_from_model(
         parent      = page,                                     # type: ignore
         model_cls   = SystemMetadata,
         instance    = system_metadata,
     )
     meta_frame.grid(row=1, column=0, sticky="ew", padx=12, pady=(0, 12))
 
+    # Autosave: edits are journaled so a crashed session can be restored.
+    # Each instance has its own journal; other running instances' are skipped.
+    journal_path = journal_path_for_process(config_path())
+    orphaned_journals = claim_orphaned_journals(config_path())
+    previous_session = next(
+        (s for s in (o.load() for o in orphaned_journals) if not s.is_empty()),
+        ConfigState(),
+    )
+    journal = AutosaveJournal(journal_path)
+
+    # Undo/redo works on ConfigState snapshots, starting from the form defaults
+    initial_state = ConfigState()
+    for f, get in meta_getters.items():
+        initial_state = initial_state.apply({"op": "meta", "field": f, "value": get()})
+    history = History(initial_state)
+
+    def record_edit(event: dict) -> None:
+        history.record(event)
+        journal.record(event)
+
+    watch_form(
+        meta_widgets,
+        meta_getters,
+        lambda f, v: record_edit({"op": "meta", "field": f, "value": v}),
+    )
+
     # ---------- Devices section ----------
     device_cards: list[DeviceCard] = []
-    kind_to_group = discover_kinds_and_groups()
+    cards_by_number: dict[int, DeviceCard] = {}
+    plugin_index = PluginIndex()
+    plugin_index.rebuild()
+    kind_to_group = plugin_index.kind_to_group()
+
+    title_cache = TitleCache(config_path() / TITLE_CACHE_FILENAME)
+    search_index = build_search_index(plugin_index.distributions(), title_cache)
+
+    def lookup_title(group: str, name: str) -> str | None:
+        entry = search_index.get((group, name))
+        return entry.title if entry else None
+
+    title_save_pending = False
+
+    def save_titles() -> None:
+        nonlocal title_save_pending
+        title_save_pending = False
+        title_cache.save()
+
+    def remember_title(group: str, name: str, title: str) -> None:
+        """Called by the cards whenever they load a device class anyway."""
+        nonlocal title_save_pending
+        entry = search_index.get((group, name))
+        if entry is None or entry.title == title:
+            return
+        search_index.set_title((group, name), title)
+        title_cache.set_title(entry.distribution, (group, name), title)
+        # A card loads a whole group's classes at once; write the file once
+        if not title_save_pending:
+            title_save_pending = True
+            app.after_idle(save_titles)
+
+    devices_header = ctk.CTkFrame(page, fg_color="transparent")
+    devices_header.grid(row=2, column=0, sticky="ew", padx=12, pady=(0, 8))
+    devices_header.grid_columnconfigure(1, weight=1)
+
+    devices_title = ctk.CTkLabel(devices_header, text="Devices", font=ctk.CTkFont(size=15, weight="bold"))
+    devices_title.grid(row=0, column=0, sticky="w")
+
+    search_var = ctk.StringVar()
+    search_entry = ctk.CTkEntry(
+        devices_header,
+        textvariable     = search_var,
+        placeholder_text = "Search devices by kind, name, vendor…",
+    )
+    search_entry.grid(row=0, column=1, sticky="ew", padx=(12, 0))
 
-    devices_title = ctk.CTkLabel(page, text="Devices", font=ctk.CTkFont(size=15, weight="bold"))
-    devices_title.grid(row=2, column=0, sticky="w", padx=12, pady=(0, 8))
+    search_results = ctk.CTkFrame(devices_header, fg_color="transparent")
+    search_results.grid(row=1, column=0, columnspan=2, sticky="ew")
+    search_results.grid_columnconfigure(0, weight=1)
 
     device_count = 0
     next_row = 3  # first row after the Devices header
+    current_add_row: ctk.CTkFrame | None = None
 
     def make_add_row(row: int) -> ctk.CTkFrame:
         """
         Create a row that contains the 'Add Device' button.
         This row is placed where the next device card will appear.
         """
+        nonlocal current_add_row
         add_row = ctk.CTkFrame(page, corner_radius=12)
         add_row.grid(row=row, column=0, sticky="ew", padx=12, pady=(0, 10))
         
@@ -84,24 +175,8 @@ def main() -> None:
         add_row.grid_columnconfigure(2, weight=1)
 
         def on_add_clicked() -> None:
-            nonlocal device_count, next_row
-            device_count += 1
-
-            for child in add_row.winfo_children():
-                child.destroy()
-
-            # Insert the actual device card at the same row index
-            card = DeviceCard(
-                add_row,
-                device_number = device_count,
-                kind_to_group = kind_to_group,
-            )
-            device_cards.append(card)
-            card.pack(fill="x", expand=True, padx=0, pady=0)
-
-            # Create the next "Add Device" row just below this card
-            next_row = row + 1
-            make_add_row(next_row)
+            card = add_device_card(add_row, row)
+            record_edit({"op": "add_device", "device": card.device_number})
 
         add_btn = ctk.CTkButton(
             add_row,
@@ -111,11 +186,95 @@ def main() -> None:
         )
         add_btn.grid(row=0, column=1, pady=16)
 
+        current_add_row = add_row
         return add_row
 
+    def add_device_card(
+        add_row: ctk.CTkFrame,
+        row: int,
+        device_number: int | None = None,
+    ) -> DeviceCard:
+        """Replace the 'Add Device' row with a device card and add a new one below."""
+        nonlocal device_count, next_row
+        device_count = max(device_count + 1, device_number or 0)
+        number = device_number or device_count
+
+        for child in add_row.winfo_children():
+            child.destroy()
+
+        def on_card_change(field: str, value) -> None:
+            record_edit({"op": "device", "device": number, "field": field, "value": value})
+
+        # Insert the actual device card at the same row index
+        card = DeviceCard(
+            add_row,
+            device_number     = number,
+            kind_to_group     = kind_to_group,
+            on_change         = on_card_change,
+            lookup_title      = lookup_title,
+            on_title          = remember_title,
+            entry_point_names = plugin_index.entry_point_names,
+        )
+        device_cards.append(card)
+        cards_by_number[number] = card
+        card.pack(fill="x", expand=True, padx=0, pady=0)
+
+        # Create the next "Add Device" row just below this card
+        next_row = row + 1
+        make_add_row(next_row)
+        return card
+
     # Put the first "Add Device" row where the first device card will go
     make_add_row(next_row)
 
+    # ---------- Device search ----------
+    def on_search_result_picked(entry: SearchEntry) -> None:
+        search_var.set("")
+        show_search_results([])
+        # Kind and entry point are one undo step
+        with history.grouped():
+            card = add_device_card(current_add_row, next_row)  # type: ignore[arg-type]
+            record_edit({"op": "add_device", "device": card.device_number})
+            card.select(entry.kind, entry.name)
+
+    def show_search_results(results: list[SearchEntry]) -> None:
+        for child in search_results.winfo_children():
+            child.destroy()
+        for i, entry in enumerate(results):
+            ctk.CTkButton(
+                search_results,
+                text    = f"{entry.label}  ·  {entry.kind.replace('_', ' ')}  ·  {entry.distribution}",
+                anchor  = "w",
+                fg_color = "transparent",
+                command = lambda e=entry: on_search_result_picked(e),
+            ).grid(row=i, column=0, sticky="ew", pady=(4 if i == 0 else 0, 0))
+
+    search_entry.bind(
+        "<KeyRelease>",
+        lambda _e: show_search_results(search_index.search(search_var.get(), limit=SEARCH_RESULTS)),
+        add="+",
+    )
+
+
+    # ---------- Restore a crashed session ----------
+    if not previous_session.is_empty() and messagebox.askyesno(
+        "Restore session",
+        "The configurator did not shut down cleanly last time.\n"
+        "Restore the unsaved configuration?",
+    ):
+        set_form_values(meta_widgets, dict(previous_session.meta))
+        for number, state in sorted(previous_session.devices.items()):
+            card = add_device_card(current_add_row, next_row, device_number=number)  # type: ignore[arg-type]
+            card.apply_state(None, state)
+        for event in previous_session.to_events():
+            initial_state = initial_state.apply(event)
+        history = History(initial_state)
+        journal = AutosaveJournal(journal_path, state=previous_session)
+    # Restored or declined, the leftovers have been dealt with
+    for orphan in orphaned_journals:
+        orphan.discard()
+    journal.start()
+
     # ---------- Footer actions ----------
     footer.grid_columnconfigure(0, weight=1)  # status
     footer.grid_columnconfigure(1, weight=1)  # filename entry expands
@@ -149,15 +308,23 @@ def main() -> None:
 
         # ---- Build DeviceDefs from current cards
         devices: list[DeviceDef] = []
+        locked: list[LockedEntryPoint] = []
         for i, card in enumerate(device_cards, start=1):
             name = card.get_name()
             kind = card.get_kind()
+            group = card.get_group()
             entry_point = card.get_entry_point()
 
             # Skip incomplete cards (or you can show an error instead)
-            if not (name and kind and entry_point):
+            if not (name and kind and group and entry_point):
                 continue
 
+            try:
+                locked.append(lock_entry_point(group, entry_point))
+            except (EntryPointNotFound, EntryPointNotUnique) as e:
+                status.configure(text=f"Export failed: {e}")
+                return
+
             devices.append(
                 DeviceDef(
                     name=name,
@@ -175,7 +342,7 @@ def main() -> None:
 
         try:
             path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(system_config.to_toml(), encoding="utf-8")
+            write_config_with_lockfile(path, system_config.to_toml(), locked)
         except OSError as e:
             status.configure(text=f"Export failed: {e}")
             return
@@ -190,8 +357,101 @@ def main() -> None:
     )
     export_btn.grid(row=0, column=2, sticky="e", padx=12, pady=12)
 
+    # ---------- Undo / redo ----------
+    def render_transition(old: ConfigState, new: ConfigState) -> None:
+        """Update only the widgets whose state differs between `old` and `new`."""
+        changed_meta = old.changed_meta(new)
+        if changed_meta:
+            set_form_values(meta_widgets, {f: new.meta.get(f) for f in changed_meta})
+        for number in old.changed_devices(new):
+            card = cards_by_number.get(number)
+            if card is not None:
+                card.apply_state(old.devices.get(number), new.devices.get(number))
+        for event in old.events_to(new):
+            journal.record(event)
+
+    def on_undo(_event=None) -> str:
+        transition = history.undo()
+        if transition:
+            render_transition(*transition)
+        else:
+            status.configure(text="Nothing to undo")
+        return "break"
+
+    def on_redo(_event=None) -> str:
+        transition = history.redo()
+        if transition:
+            render_transition(*transition)
+        else:
+            status.configure(text="Nothing to redo")
+        return "break"
+
+    # Not Ctrl+Y: Tk on X11 binds it to <<Paste>> in entries and text boxes
+    app.bind_all("<Control-z>", on_undo)
+    app.bind_all("<Control-Shift-Z>", on_redo)
+
+    # ---------- Autosave status ----------
+    autosave_error: OSError | None = None
+
+    def poll_autosave() -> None:
+        nonlocal autosave_error
+        error = journal.error
+        if error is not autosave_error:
+            autosave_error = error
+            if error is not None:
+                status.configure(text=f"Autosave failed: {error}")
+            else:
+                status.configure(text="Autosave resumed")
+        app.after(AUTOSAVE_POLL_MS, poll_autosave)
+
+    app.after(AUTOSAVE_POLL_MS, poll_autosave)
+
+    # ---------- Plugin environment watching ----------
+    watcher = EnvironmentWatcher()
+
+    def poll_plugin_environment() -> None:
+        nonlocal kind_to_group
+        try:
+            changes = watcher.poll()
+            if not changes:
+                return
+            # importlib.metadata caches directory listings
+            importlib.invalidate_caches()
+            affected = plugin_index.refresh(changes.all)
+            needs_restart = invalidate_device_classes(affected)
+            for dist_name in changes.all:
+                search_index.update_distribution(
+                    dist_name,
+                    entries_for_distribution(dist_name, title_cache.titles_for(dist_name)),
+                )
+            kind_to_group = plugin_index.kind_to_group()
+
+            failed: list[str] = []
+            for card in device_cards:
+                try:
+                    card.refresh_discovery(kind_to_group, affected)
+                except Exception as e:  # a freshly installed plugin may fail to import
+                    failed.append(f"Device {card.device_number}: {e}")
+
+            msg = f"Plugins updated: {', '.join(sorted(changes.all))}"
+            if failed:
+                msg += " (refresh failed for " + "; ".join(failed) + ")"
+            if needs_restart:
+                msg += " - restart to make sure the new plugin code is used"
+            status.configure(text=msg)
+        except Exception as e:
+            status.configure(text=f"Plugin refresh failed: {e}")
+        finally:
+            # Keep watching even if this refresh failed
+            app.after(PLUGIN_POLL_MS, poll_plugin_environment)
+
+    watcher.start()
+    app.after(PLUGIN_POLL_MS, poll_plugin_environment)
 
     app.mainloop()
+    watcher.stop()
+    title_cache.save()
+    journal.close(discard=True)
 
 
 
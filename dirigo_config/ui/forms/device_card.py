@@ -1,5 +1,5 @@
 import customtkinter as ctk
-from typing import Dict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from dirigo.config.system_config import DeviceDef
 
@@ -7,7 +7,10 @@ from dirigo_config.discovery.devices import (
     discover_entry_point_names, load_device_class,
     EntryPointNotFound, EntryPointNotUnique, EntryPointInvalidType
 )
-from dirigo_config.ui.forms.pydantic_form import build_form_from_model
+from dirigo_config.state import CONFIG_FIELD_PREFIX, DeviceState
+from dirigo_config.ui.forms.pydantic_form import (
+    build_form_from_model, set_form_values, set_widget_text, watch_form, watch_widget
+)
 
 
 
@@ -17,6 +20,7 @@ EP_DESC = DeviceDef.model_fields["entry_point"].description or ""
 
 KIND_PLACEHOLDER = "Select device kind…"
 EP_PLACEHOLDER = "Select entry point name…"
+EP_NONE_FOUND = "(no entry points found)"
 
 
 
@@ -32,11 +36,30 @@ class DeviceCard(ctk.CTkFrame):
         *,
         device_number: int,
         kind_to_group: Dict[str, str],
+        on_change: Optional[Callable[[str, Any], None]] = None,
+        lookup_title: Optional[Callable[[str, str], Optional[str]]] = None,
+        on_title: Optional[Callable[[str, str, str], None]] = None,
+        entry_point_names: Optional[Callable[[str], List[str]]] = None,
     ) -> None:
+        """
+        `on_change(field, value)` is called after each user edit, with field
+        "name", "kind", "entry_point" or "config.<field name>".
+
+        `lookup_title(group, name)` may return an already known device title so
+        the entry point menu can be filled without importing the class.
+        `on_title(group, name, title)` is called whenever the card had to load a
+        device class, so its title can be remembered for next time.
+        `entry_point_names(group)` lists the entry points of a group, e.g. from
+        a `PluginIndex`; by default the environment is scanned.
+        """
         super().__init__(parent, corner_radius=12)
 
         self.kind_to_group = kind_to_group
         self.device_number = device_number
+        self._on_change = on_change
+        self._lookup_title = lookup_title
+        self._on_title = on_title
+        self._entry_point_names = entry_point_names or discover_entry_point_names
 
         self.grid_columnconfigure(1, weight=1)
 
@@ -56,6 +79,7 @@ class DeviceCard(ctk.CTkFrame):
         ctk.CTkLabel(self, text="Device Name:").grid(row=row, column=0, sticky="w", padx=12, pady=(6, 6))
         self.name_entry = ctk.CTkEntry(self, placeholder_text="e.g. 'main digitizer', 'fast axis scanner'")
         self.name_entry.grid(row=row, column=1, sticky="ew", padx=12, pady=(6, 6))
+        watch_widget(self.name_entry, lambda: self._notify("name", self.get_name()))
         row += 1
         self._add_help(row, NAME_DESC)
         row += 1
@@ -65,19 +89,14 @@ class DeviceCard(ctk.CTkFrame):
             row=row, column=0, sticky="w", padx=12, pady=6
         )
 
-        kinds = sorted(self.kind_to_group.keys())
-        kind_labels = [_kind_to_label(k) for k in kinds]
-
-        self._label_to_kind = dict(zip(kind_labels, kinds))
-        self._kind_to_label = dict(zip(kinds, kind_labels))
-
         self.kind_var = ctk.StringVar(value=KIND_PLACEHOLDER)
         self.kind_menu = ctk.CTkOptionMenu(
             self,
-            values   = [KIND_PLACEHOLDER] + kind_labels,
+            values   = [KIND_PLACEHOLDER],
             variable = self.kind_var,
-            command  = self._on_kind_change,
+            command  = self._on_kind_selected,
         )
+        self._set_kind_values()
         self.kind_menu.grid(row=row, column=1, sticky="ew", padx=12, pady=6)
         row += 1
         self._add_help(row, KIND_DESC)
@@ -88,12 +107,13 @@ class DeviceCard(ctk.CTkFrame):
             row=row, column=0, sticky="w", padx=12, pady=6
         )
 
+        self._title_to_ep: dict[str, str] = {}
         self.entry_point_var = ctk.StringVar(value=EP_PLACEHOLDER)
         self.entry_point_menu = ctk.CTkOptionMenu(
             self, 
             values   = [EP_PLACEHOLDER],
             variable = self.entry_point_var,
-            command  = self._on_name_change
+            command  = self._on_entry_point_selected,
         )
         self.entry_point_menu.grid(row=row, column=1, sticky="ew", padx=12, pady=6)
         row += 1
@@ -108,6 +128,8 @@ class DeviceCard(ctk.CTkFrame):
 
         self._config_model_cls = None
         self._config_getters = {}
+        self._config_widgets = {}
+        self._config_defaults = {}
 
         self._set_config_placeholder("Select an entry point to configure this device.")
         row += 1
@@ -132,15 +154,73 @@ class DeviceCard(ctk.CTkFrame):
         lbl.grid(row=0, column=0, sticky="w", padx=12, pady=12)
         self._config_model_cls = None
         self._config_getters = {}
+        self._config_widgets = {}
+        self._config_defaults = {}
+
+    def _notify(self, field: str, value: Any) -> None:
+        if self._on_change is not None:
+            self._on_change(field, value)
+
+    def _on_kind_selected(self, selected_label: str) -> None:
+        self._on_kind_change(selected_label)
+        self._notify("kind", self.get_kind())
+
+    def _on_entry_point_selected(self, selected_title: str) -> None:
+        self._on_name_change(selected_title)
+        self._notify("entry_point", self.get_entry_point())
 
     def _clear_config_area(self) -> None:
         for child in self.config_container.winfo_children():
             child.destroy()
+        self._config_getters = {}
+        self._config_widgets = {}
+        self._config_defaults = {}
+
+    def _set_kind_values(self) -> None:
+        kinds = sorted(self.kind_to_group.keys())
+        kind_labels = [_kind_to_label(k) for k in kinds]
+
+        self._label_to_kind = dict(zip(kind_labels, kinds))
+        self._kind_to_label = dict(zip(kinds, kind_labels))
+
+        self.kind_menu.configure(values=[KIND_PLACEHOLDER] + kind_labels)
+
+    def _set_entry_point_values(self, group: str, *, load_missing: bool = True) -> None:
+        ep_names = self._entry_point_names(group) if group else []
+
+        self._title_to_ep = {}
+        for ep_name in ep_names:
+            title = self._lookup_title(group, ep_name) if self._lookup_title else None
+            if title is None and load_missing:
+                try:
+                    title = self._load_title(group, ep_name)
+                except Exception:
+                    # List it by name; selecting it shows the actual error
+                    title = None
+            self._title_to_ep[title or ep_name] = ep_name
+
+        if self._title_to_ep:
+            self.entry_point_menu.configure(
+                values = [EP_PLACEHOLDER] + list(self._title_to_ep.keys()),
+                state  = "normal",
+            )
+        else:
+            self.entry_point_menu.configure(
+                values = [EP_NONE_FOUND],
+                state  = "disabled",
+            )
+
+    def _load_title(self, group: str, ep_name: str) -> str:
+        title = load_device_class(group, ep_name).title or ep_name
+        if self._on_title is not None:
+            self._on_title(group, ep_name, title)
+        return title
 
     def _on_kind_change(self, selected_label: str) -> None:
         self._clear_config_area()
         
         if selected_label == KIND_PLACEHOLDER:
+            self._title_to_ep = {}
             self.entry_point_menu.configure(
                 values=[EP_PLACEHOLDER],
                 state="disabled",
@@ -149,27 +229,8 @@ class DeviceCard(ctk.CTkFrame):
             return
 
         kind = self._label_to_kind[selected_label]
-        group = self.kind_to_group.get(kind, "")
-        ep_names = discover_entry_point_names(group) if group else []
-
-        if ep_names:
-            self._title_to_ep: dict[str, str] = {}
-            for ep_name in ep_names:
-                cls = load_device_class(group, ep_name)
-                title = cls.title or ep_name
-                self._title_to_ep[title] = ep_name
-
-            self.entry_point_menu.configure(
-                values = [EP_PLACEHOLDER] + list(self._title_to_ep.keys()),
-                state  = "normal",
-            )
-            self.entry_point_var.set(EP_PLACEHOLDER)
-        else:
-            self.entry_point_menu.configure(
-                values = ["(no entry points found)"],
-                state  = "disabled",
-            )
-            self.entry_point_var.set("(no entry points found)")
+        self._set_entry_point_values(self.kind_to_group.get(kind, ""))
+        self.entry_point_var.set(EP_PLACEHOLDER if self._title_to_ep else EP_NONE_FOUND)
 
     def _on_name_change(self, selected_title: str) -> None:
         self._clear_config_area()
@@ -184,7 +245,7 @@ class DeviceCard(ctk.CTkFrame):
             self._set_config_placeholder("Internal error: could not resolve entry point group.")
             return
 
-        if selected_title in ("", EP_PLACEHOLDER, "(no entry points found)"):
+        if selected_title in ("", EP_PLACEHOLDER, EP_NONE_FOUND):
             self._set_config_placeholder("Select an entry point to configure this device.")
             return
 
@@ -193,6 +254,14 @@ class DeviceCard(ctk.CTkFrame):
         except (EntryPointNotFound, EntryPointNotUnique, EntryPointInvalidType) as e:
             self._set_config_placeholder(str(e))
             return
+        except Exception as e:
+            # Plugin import failed (missing SDK, DLL, ...)
+            self._set_config_placeholder(f"Could not load {selected_title!r}: {e}")
+            return
+
+        if self._on_title is not None:
+            ep_name = self._title_to_ep[selected_title]
+            self._on_title(group, ep_name, device_cls.title or ep_name)
 
         model_cls = getattr(device_cls, "config_model", None)
         if model_cls is None:
@@ -200,15 +269,18 @@ class DeviceCard(ctk.CTkFrame):
             return
         
         # Build the auto form
-        form_frame, getters, _ = build_form_from_model(
+        form_frame, getters, widgets = build_form_from_model(
             parent    = self.config_container,  # type: ignore
             model_cls = model_cls,
             instance  = None,
         )
         form_frame.grid(row=1, column=0, sticky="ew", padx=0, pady=0)
+        watch_form(widgets, getters, lambda f, v: self._notify(CONFIG_FIELD_PREFIX + f, v))
 
         self._config_model_cls = model_cls
         self._config_getters = getters
+        self._config_widgets = widgets
+        self._config_defaults = {f: get() for f, get in getters.items()}
 
     def get_name(self) -> str | None:
         txt = (self.name_entry.get() or "").strip()
@@ -221,9 +293,129 @@ class DeviceCard(ctk.CTkFrame):
         return self._label_to_kind[label]
     
     def get_entry_point(self) -> str | None:
-        ep = self.entry_point_var.get()
-        if ep in ("", EP_PLACEHOLDER, "(none)", "(no entry points found)"):
+        title = self.entry_point_var.get()
+        if title in ("", EP_PLACEHOLDER, "(none)", EP_NONE_FOUND):
             return None
-        return ep
+        # The menu shows class titles; map back to the entry point name
+        return self._title_to_ep.get(title, title)
 
+    def get_group(self) -> str | None:
+        kind = self.get_kind()
+        if kind is None:
+            return None
+        return self.kind_to_group.get(kind)
 
+    def refresh_discovery(
+        self,
+        kind_to_group: Dict[str, str],
+        affected: Set[Tuple[str, str]],
+    ) -> None:
+        """
+        Update the menus after the plugin environment changed.
+
+        `affected` holds the (group, entry point name) keys whose providing
+        distribution was added, removed or upgraded. The current selection is
+        kept where possible; the config form is only rebuilt when the selected
+        entry point itself is affected, and keeps the values entered so far.
+        Selections that have to be reset are reported through `on_change`.
+        """
+        self.kind_to_group = kind_to_group
+        self._set_kind_values()
+
+        kind = self.kind_var.get()
+        if kind == KIND_PLACEHOLDER:
+            return
+        if kind not in self._label_to_kind:
+            # The kind's last provider was uninstalled
+            self.kind_var.set(KIND_PLACEHOLDER)
+            self._on_kind_change(KIND_PLACEHOLDER)
+            self._notify("kind", None)
+            return
+
+        group = self.kind_to_group[self._label_to_kind[kind]]
+        if not any(g == group for g, _ in affected):
+            return
+
+        title = self.entry_point_var.get()
+        selected_ep = self._title_to_ep.get(title)
+        self._set_entry_point_values(group)
+
+        if selected_ep is None:
+            self.entry_point_var.set(EP_PLACEHOLDER if self._title_to_ep else EP_NONE_FOUND)
+            return
+
+        new_title = next((t for t, ep in self._title_to_ep.items() if ep == selected_ep), None)
+        if new_title is None:
+            self.entry_point_var.set(EP_PLACEHOLDER if self._title_to_ep else EP_NONE_FOUND)
+            self._set_config_placeholder("The selected entry point is no longer installed.")
+            self._notify("entry_point", None)
+            return
+
+        self.entry_point_var.set(new_title)
+        if (group, selected_ep) in affected:
+            entered = {f: get() for f, get in self._config_getters.items()}
+            self._on_name_change(new_title)
+            set_form_values(self._config_widgets, entered)
+            # Report values the upgraded form could not take over as entered
+            for f, get in self._config_getters.items():
+                if f in entered and get() != entered[f]:
+                    self._notify(CONFIG_FIELD_PREFIX + f, get())
+
+    def apply_state(self, old: DeviceState | None, new: DeviceState | None) -> None:
+        """
+        Bring the card from `old` to `new`, e.g. on undo/redo or when restoring
+        a session. Widgets are only rebuilt when the kind or entry point changed.
+        Does not trigger `on_change`.
+        """
+        old = old or DeviceState()
+        new = new or DeviceState()
+
+        if new.name != old.name:
+            set_widget_text(self.name_entry, new.name or "")
+
+        rebuilt = False
+        if new.kind != old.kind:
+            label = self._kind_to_label.get(new.kind or "", KIND_PLACEHOLDER)
+            self.kind_var.set(label)
+            self._on_kind_change(label)
+            rebuilt = True
+
+        if rebuilt or new.entry_point != old.entry_point:
+            title = next((t for t, ep in self._title_to_ep.items() if ep == new.entry_point), None)
+            if title is not None:
+                self.entry_point_var.set(title)
+                self._on_name_change(title)
+            elif self._title_to_ep:
+                self.entry_point_var.set(EP_PLACEHOLDER)
+                self._set_config_placeholder("Select an entry point to configure this device.")
+            rebuilt = True
+
+        fields = set(new.config) | set(old.config) | (set(self._config_defaults) if rebuilt else set())
+        set_form_values(self._config_widgets, {
+            f: new.config.get(f, self._config_defaults.get(f))
+            for f in fields
+            if rebuilt or new.config.get(f) != old.config.get(f)
+        })
+
+    def select(self, kind: str, entry_point: str) -> None:
+        """
+        Select kind and entry point in one step, e.g. from a search result.
+        Only the selected device class is loaded; other entry points of the
+        group are listed by their known title or their name.
+        """
+        label = self._kind_to_label.get(kind)
+        if label is None:
+            return
+        self.kind_var.set(label)
+        self._clear_config_area()
+        self._set_entry_point_values(self.kind_to_group[kind], load_missing=False)
+        self._notify("kind", kind)
+
+        title = next((t for t, ep in self._title_to_ep.items() if ep == entry_point), None)
+        if title is None:
+            self.entry_point_var.set(EP_PLACEHOLDER if self._title_to_ep else EP_NONE_FOUND)
+            self._set_config_placeholder("Select an entry point to configure this device.")
+            return
+        self.entry_point_var.set(title)
+        self._on_name_change(title)
+        self._notify("entry_point", entry_point)
@@ -1,5 +1,7 @@
-from typing import Any, Optional, Union, get_args, get_origin
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+import tkinter
 import types
+import weakref
 
 import customtkinter as ctk
 from pydantic import BaseModel
@@ -212,3 +214,103 @@ def build_form_from_model(
             row += 1
 
     return frame, getters, widgets
+
+
+# Text last seen in each watched widget. Programmatic writes go through
+# `set_widget_text`, which updates it, so they are not reported as edits.
+_seen_text: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+# Everything through which the user can change an entry's text: typing and
+# keyboard shortcuts, middle-click paste, clipboard virtual events (also used
+# by context menus) and leaving the field.
+_EDIT_EVENTS = (
+    "<KeyRelease>", "<ButtonRelease>", "<<Paste>>", "<<PasteSelection>>",
+    "<<Cut>>", "<<Clear>>", "<FocusOut>",
+)
+
+
+def _widget_text(widget: Any) -> str:
+    if isinstance(widget, ctk.CTkTextbox):
+        return widget.get("1.0", "end-1c")
+    return widget.get()
+
+
+def set_widget_text(widget: Any, text: str) -> None:
+    """Replace the text of an entry or textbox without it counting as a user edit."""
+    if isinstance(widget, ctk.CTkTextbox):
+        widget.delete("1.0", "end")
+        widget.insert("1.0", text)
+        widget.edit_modified(False)
+    else:
+        widget.delete(0, "end")
+        widget.insert(0, text)
+    if widget in _seen_text:
+        _seen_text[widget] = _widget_text(widget)
+
+
+def watch_widget(widget: Any, on_change: Callable[[], None]) -> None:
+    """
+    Call `on_change()` whenever the user changed the text of an entry or
+    textbox. Changes are detected by comparing values, so a key or event that
+    leaves the text as it was (e.g. Ctrl+Z) is not an edit.
+    """
+    _seen_text[widget] = _widget_text(widget)
+
+    def _check() -> None:
+        try:
+            text = _widget_text(widget)
+        except tkinter.TclError:  # destroyed in the meantime
+            return
+        if text != _seen_text.get(widget):
+            _seen_text[widget] = text
+            on_change()
+
+    def _on_event(_event=None) -> None:
+        # Let the class bindings (which perform the edit) run first
+        widget.after_idle(_check)
+
+    for sequence in _EDIT_EVENTS:
+        widget.bind(sequence, _on_event, add="+")
+
+    if isinstance(widget, ctk.CTkTextbox):
+        def _on_modified(_event=None) -> None:
+            if widget.edit_modified():
+                widget.edit_modified(False)
+                _check()
+
+        widget.bind("<<Modified>>", _on_modified, add="+")
+
+
+def set_form_values(widgets: dict[str, Any], values: dict[str, Any]) -> None:
+    """
+    Fill widgets built by `build_form_from_model` with getter-shaped values,
+    e.g. to restore a form. Unknown fields are ignored.
+    """
+    for field_name, value in values.items():
+        widget = widgets.get(field_name)
+        if widget is None:
+            continue
+        if isinstance(widget, tuple):
+            mn_w, mx_w = widget
+            value = value or {}
+            set_widget_text(mn_w, str(value.get("min", "")))
+            set_widget_text(mx_w, str(value.get("max", "")))
+        else:
+            set_widget_text(widget, "" if value is None else str(value))
+
+
+def watch_form(
+    widgets: dict[str, Any],
+    getters: dict[str, Any],
+    on_change: Callable[[str, Any], None],
+) -> None:
+    """
+    Call `on_change(field_name, value)` whenever the user edits a field of a
+    form built by `build_form_from_model`.
+    """
+    for field_name, widget in widgets.items():
+        def _changed(f=field_name) -> None:
+            on_change(f, getters[f]())
+
+        for w in (widget if isinstance(widget, tuple) else (widget,)):
+            watch_widget(w, _changed)
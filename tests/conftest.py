@@ -0,0 +1,52 @@
+import importlib
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pytest
+
+
+def _write_dist(
+    site: Path,
+    name: str,
+    version: str = "1.0",
+    entry_points: Optional[Dict[str, Dict[str, str]]] = None,
+    record: str = "",
+    author_email: str = "Jane Doe <jane@example.com>",
+) -> Path:
+    """
+    Write a minimal installed distribution (dist-info directory only) to `site`.
+
+    `entry_points` maps group -> {name: "module:attr"}.
+    """
+    dist_info = site / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+        f"Author-email: {author_email}\n",
+        encoding="utf-8",
+    )
+    lines = []
+    for group, eps in (entry_points or {}).items():
+        lines.append(f"[{group}]")
+        lines += [f"{ep_name} = {target}" for ep_name, target in eps.items()]
+    (dist_info / "entry_points.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    (dist_info / "RECORD").write_text(record, encoding="utf-8")
+    importlib.invalidate_caches()
+    return dist_info
+
+
+@pytest.fixture
+def site_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """An empty site-packages directory at the front of sys.path."""
+    site = tmp_path / "site"
+    site.mkdir()
+    monkeypatch.syspath_prepend(str(site))
+    return site
+
+
+@pytest.fixture
+def make_dist(site_dir: Path) -> Callable[..., Path]:
+    """Install fake distributions into `site_dir`; see `_write_dist`."""
+    def _make(name: str, **kwargs) -> Path:
+        return _write_dist(site_dir, name, **kwargs)
+    return _make
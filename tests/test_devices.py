@@ -0,0 +1,131 @@
+import sys
+import types
+from importlib.machinery import ExtensionFileLoader, ModuleSpec
+
+import pytest
+
+pytest.importorskip("dirigo.hw_interfaces.hw_interface")
+
+from dirigo_config.discovery import devices  # noqa: E402
+from dirigo_config.discovery.devices import (  # noqa: E402
+    EntryPointNotFound, _purge_modules, invalidate_device_classes, load_device_class,
+)
+
+
+CAMERAS = "dirigo.devices.cameras"
+
+CAMERA_SOURCE = """\
+from dirigo.hw_interfaces.hw_interface import Device
+from {pkg} import helpers
+
+
+class Camera(Device):
+    title = "Fake camera"
+"""
+
+
+@pytest.fixture
+def fake_plugin(site_dir, make_dist, request):
+    """
+    Install a pure-Python plugin package; `extra_record` lines ("{pkg}" is
+    replaced by the package name) are appended to its RECORD.
+    Returns (entry point key, package name).
+    """
+    pkg = f"dirigo_fake_{request.node.name}"
+    pkg_dir = site_dir / pkg
+    pkg_dir.mkdir()
+    (pkg_dir / "__init__.py").write_text("", encoding="utf-8")
+    (pkg_dir / "helpers.py").write_text("", encoding="utf-8")
+    (pkg_dir / "camera.py").write_text(CAMERA_SOURCE.format(pkg=pkg), encoding="utf-8")
+
+    def install(extra_record: str = "", record: bool = True):
+        lines = [f"{pkg}/__init__.py,,", f"{pkg}/helpers.py,,", f"{pkg}/camera.py,,"]
+        make_dist(
+            pkg.replace("_", "-"),
+            entry_points={CAMERAS: {pkg: f"{pkg}.camera:Camera"}},
+            record=("\n".join(lines) + "\n" + extra_record.format(pkg=pkg)) if record else "",
+        )
+        return (CAMERAS, pkg), pkg
+
+    yield install
+
+    for name in [m for m in sys.modules if m == pkg or m.startswith(pkg + ".")]:
+        del sys.modules[name]
+    for cache in (devices._device_class_cache, devices._device_class_modules):
+        for key in [k for k in cache if k[1] == pkg]:
+            del cache[key]
+
+
+def test_load_device_class_caches(fake_plugin):
+    key, _ = fake_plugin()
+
+    cls = load_device_class(*key)
+    assert cls.title == "Fake camera"
+    assert load_device_class(*key) is cls
+
+    with pytest.raises(EntryPointNotFound):
+        load_device_class(CAMERAS, "not_installed")
+
+
+def test_invalidate_unloads_whole_distribution(fake_plugin):
+    key, pkg = fake_plugin()
+    old = load_device_class(*key)
+    assert f"{pkg}.helpers" in sys.modules
+
+    assert invalidate_device_classes([key]) == set()
+
+    assert not any(m == pkg or m.startswith(pkg + ".") for m in sys.modules)
+    assert "dirigo.hw_interfaces.hw_interface" in sys.modules
+    assert load_device_class(*key) is not old
+
+
+def test_invalidate_without_record_needs_restart(fake_plugin):
+    key, pkg = fake_plugin(record=False)
+    load_device_class(*key)
+
+    assert invalidate_device_classes([key]) == {key}
+    assert f"{pkg}.camera" not in sys.modules
+
+
+def test_invalidate_native_distribution_needs_restart(fake_plugin):
+    key, _ = fake_plugin("{pkg}/_native.cpython-311-x86_64-linux-gnu.so,,\n")
+    load_device_class(*key)
+
+    assert invalidate_device_classes([key]) == {key}
+
+
+def test_invalidate_unknown_key_is_ignored():
+    assert invalidate_device_classes([(CAMERAS, "never_loaded")]) == set()
+
+
+def _module(name: str, native: bool = False) -> types.ModuleType:
+    module = types.ModuleType(name)
+    if native:
+        module.__spec__ = ModuleSpec(name, ExtensionFileLoader(name, f"/site/{name}.so"))
+    return module
+
+
+def test_purge_modules(monkeypatch):
+    for name in ["fakepkg", "fakepkg.sub", "fakepkg.sub.deep", "fakepkg_other", "fakemod"]:
+        monkeypatch.setitem(sys.modules, name, _module(name))
+
+    assert _purge_modules(frozenset({"fakepkg.*", "fakemod"})) is False
+
+    assert [m for m in sys.modules if m.startswith("fake")] == ["fakepkg_other"]
+
+
+def test_purge_modules_keeps_dirigo(monkeypatch):
+    monkeypatch.setitem(sys.modules, "dirigo.fake_helper", _module("dirigo.fake_helper"))
+
+    _purge_modules(frozenset({"dirigo.*"}))
+
+    assert "dirigo.fake_helper" in sys.modules
+    assert "dirigo.hw_interfaces.hw_interface" in sys.modules
+
+
+def test_purge_modules_reports_extensions(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fakepkg", _module("fakepkg"))
+    monkeypatch.setitem(sys.modules, "fakepkg._native", _module("fakepkg._native", native=True))
+
+    assert _purge_modules(frozenset({"fakepkg"})) is False
+    assert _purge_modules(frozenset({"fakepkg.*"})) is True
@@ -0,0 +1,136 @@
+import importlib
+import os
+import shutil
+import time
+
+import pytest
+
+pytest.importorskip("dirigo.hw_interfaces.hw_interface")
+
+from dirigo_config.discovery.environment import (  # noqa: E402
+    DistributionStamp, EnvironmentChanges, EnvironmentSnapshotter, EnvironmentWatcher,
+    PluginIndex, diff_snapshots, normalize_dist_name,
+)
+
+
+CAMERAS = "dirigo.devices.cameras"
+SCANNERS = "dirigo.devices.scanners"
+
+
+def _bump_mtime(path, step_ns: int = 10**9) -> None:
+    # Make directory changes visible regardless of filesystem timestamp granularity
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + step_ns))
+
+
+@pytest.mark.parametrize("name", ["Dirigo-Alazar", "dirigo_alazar", "dirigo.alazar", "dirigo--alazar"])
+def test_normalize_dist_name(name):
+    assert normalize_dist_name(name) == "dirigo_alazar"
+
+
+def test_diff_snapshots():
+    a = DistributionStamp("a", "/site/a-1.dist-info", 1)
+    b = DistributionStamp("b", "/site/b-1.dist-info", 1)
+    b2 = DistributionStamp("b", "/site/b-2.dist-info", 2)
+    c = DistributionStamp("c", "/site/c-1.dist-info", 1)
+
+    changes = diff_snapshots({"a": a, "b": b}, {"b": b2, "c": c})
+
+    assert changes == EnvironmentChanges(added={"c"}, removed={"a"}, changed={"b"})
+    assert changes.all == {"a", "b", "c"}
+    assert not diff_snapshots({"a": a}, {"a": a})
+
+
+def test_snapshotter_detects_install_upgrade_and_removal(site_dir, make_dist):
+    snapshotter = EnvironmentSnapshotter([str(site_dir)])
+    assert snapshotter.snapshot() == {}
+
+    make_dist("Dirigo-Basler", version="1.0")
+    _bump_mtime(site_dir)
+    first = snapshotter.snapshot()
+    assert set(first) == {"dirigo_basler"}
+    assert first["dirigo_basler"].path.endswith("-1.0.dist-info")
+
+    shutil.rmtree(first["dirigo_basler"].path)
+    make_dist("Dirigo-Basler", version="2.0")
+    _bump_mtime(site_dir, 2 * 10**9)
+    second = snapshotter.snapshot()
+    assert diff_snapshots(first, second) == EnvironmentChanges(changed={"dirigo_basler"})
+
+    shutil.rmtree(second["dirigo_basler"].path)
+    _bump_mtime(site_dir, 3 * 10**9)
+    assert diff_snapshots(second, snapshotter.snapshot()) == EnvironmentChanges(
+        removed={"dirigo_basler"}
+    )
+
+
+def test_snapshotter_reuses_unchanged_directories(site_dir, make_dist, monkeypatch):
+    make_dist("dirigo-basler")
+    snapshotter = EnvironmentSnapshotter([str(site_dir)])
+    snapshotter.snapshot()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged directory was rescanned")
+
+    monkeypatch.setattr(os, "scandir", fail)
+    assert set(snapshotter.snapshot()) == {"dirigo_basler"}
+
+
+def test_plugin_index_refresh(site_dir, make_dist):
+    make_dist("dirigo-basler", entry_points={CAMERAS: {"ace": "dirigo_basler:Ace"}})
+    index = PluginIndex()
+    index.rebuild()
+
+    assert "dirigo_basler" in index.distributions()
+    assert index.kind_to_group()["cameras"] == CAMERAS
+    assert index.entry_point_names(CAMERAS) == ["ace"]
+
+    # Upgrade: one entry point replaced, a new kind added
+    shutil.rmtree(site_dir / "dirigo_basler-1.0.dist-info")
+    make_dist(
+        "dirigo-basler",
+        version="2.0",
+        entry_points={
+            CAMERAS: {"ace2": "dirigo_basler:Ace2"},
+            SCANNERS: {"galvo": "dirigo_basler:Galvo"},
+        },
+    )
+    affected = index.refresh(["Dirigo-Basler"])
+
+    assert affected == {(CAMERAS, "ace"), (CAMERAS, "ace2"), (SCANNERS, "galvo")}
+    assert index.entry_point_names(CAMERAS) == ["ace2"]
+    assert index.entry_point_names(SCANNERS) == ["galvo"]
+    assert index.kind_to_group()["scanners"] == SCANNERS
+
+    # Removal
+    shutil.rmtree(site_dir / "dirigo_basler-2.0.dist-info")
+    importlib.invalidate_caches()
+    affected = index.refresh(["dirigo_basler"])
+
+    assert affected == {(CAMERAS, "ace2"), (SCANNERS, "galvo")}
+    assert "dirigo_basler" not in index.distributions()
+    assert index.entry_point_names(CAMERAS) == []
+
+
+def test_watcher_queues_changes(site_dir, make_dist):
+    watcher = EnvironmentWatcher(
+        interval_s=0.01, snapshotter=EnvironmentSnapshotter([str(site_dir)])
+    )
+    watcher.start()
+    try:
+        assert watcher.poll() is None
+        make_dist("dirigo-basler")
+        make_dist("dirigo-thorlabs")
+        _bump_mtime(site_dir)
+
+        merged = EnvironmentChanges()
+        deadline = time.monotonic() + 5.0
+        while merged.added != {"dirigo_basler", "dirigo_thorlabs"} and time.monotonic() < deadline:
+            changes = watcher.poll()
+            if changes is not None:
+                merged = EnvironmentChanges(added=merged.added | changes.added)
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+
+    assert merged.added == {"dirigo_basler", "dirigo_thorlabs"}
@@ -0,0 +1,171 @@
+import json
+import os
+import time
+
+from dirigo_config.journal import (
+    AutosaveJournal, claim_orphaned_journals, journal_path_for_process, load_journal,
+)
+from dirigo_config.state import ConfigState
+
+
+EVENTS = [
+    {"op": "meta", "field": "name", "value": "two-photon"},
+    {"op": "add_device", "device": 1},
+    {"op": "device", "device": 1, "field": "kind", "value": "digitizer"},
+    {"op": "device", "device": 1, "field": "entry_point", "value": "alazar"},
+    {"op": "device", "device": 1, "field": "config.sample_rate", "value": "125 MS/s"},
+]
+
+
+def _replay(events) -> ConfigState:
+    state = ConfigState()
+    for event in events:
+        state = state.apply(event)
+    return state
+
+
+def _wait_for(condition, timeout_s: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_load_missing_journal(tmp_path):
+    assert load_journal(tmp_path / "missing.jsonl").is_empty()
+
+
+def test_load_ignores_torn_final_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    lines = [json.dumps(e) for e in EVENTS[:3]]
+    path.write_text("\n".join(lines) + '\n{"op": "device", "dev', encoding="utf-8")
+
+    assert load_journal(path) == _replay(EVENTS[:3])
+
+
+def test_journal_roundtrip(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = AutosaveJournal(path, flush_interval_s=0.01)
+    journal.start()
+    for event in EVENTS:
+        journal.record(event)
+    # Typing: only the last value of a field matters
+    for i in range(50):
+        journal.record({"op": "meta", "field": "description", "value": "x" * i})
+    journal.close()
+
+    expected = _replay(EVENTS + [{"op": "meta", "field": "description", "value": "x" * 49}])
+    assert journal.error is None
+    assert load_journal(path) == expected
+
+
+def test_journal_compacts(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = AutosaveJournal(path, flush_interval_s=0.01, compact_every=5)
+    journal.start()
+    for i in range(20):
+        journal.record({"op": "meta", "field": f"field_{i}", "value": i})
+        journal.record({"op": "meta", "field": "counter", "value": i})
+    journal.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    expected = _replay(
+        [{"op": "meta", "field": f"field_{i}", "value": i} for i in range(20)]
+        + [{"op": "meta", "field": "counter", "value": 19}]
+    )
+    assert load_journal(path) == expected
+    assert len(lines) < 40
+
+
+def test_journal_starts_from_restored_state(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    restored = _replay(EVENTS)
+    path.write_text("garbage from a previous session\n", encoding="utf-8")
+
+    journal = AutosaveJournal(path, state=restored)
+    journal.start()
+    journal.close()
+
+    assert load_journal(path) == restored
+
+
+def test_close_discard_removes_file(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = AutosaveJournal(path)
+    journal.start()
+    journal.record(EVENTS[0])
+    journal.close(discard=True)
+
+    assert not path.exists()
+
+
+def test_write_errors_are_reported_and_recovered(tmp_path):
+    # A file where the journal's directory should be makes every write fail
+    blocker = tmp_path / "autosave"
+    blocker.write_text("", encoding="utf-8")
+    path = blocker / "journal.jsonl"
+
+    journal = AutosaveJournal(path, flush_interval_s=0.01)
+    journal.start()
+    try:
+        assert isinstance(journal.error, OSError)
+        for event in EVENTS:
+            journal.record(event)
+        assert _wait_for(journal._queue.empty)
+        assert journal._thread is not None and journal._thread.is_alive()
+
+        blocker.unlink()
+        assert _wait_for(lambda: journal.error is None and path.exists())
+    finally:
+        journal.close()
+
+    assert load_journal(path) == _replay(EVENTS)
+
+
+def test_journal_path_for_process(tmp_path):
+    path = journal_path_for_process(tmp_path)
+
+    assert path.parent == tmp_path
+    assert str(os.getpid()) in path.name
+
+
+def test_running_journals_are_not_orphaned(tmp_path):
+    journal = AutosaveJournal(tmp_path / "dirigo-config.journal.1.jsonl")
+    journal.start()
+    journal.record(EVENTS[0])
+    try:
+        assert claim_orphaned_journals(tmp_path) == []
+    finally:
+        # Not discarded: as if the process had crashed
+        journal.close()
+
+    [orphan] = claim_orphaned_journals(tmp_path)
+    assert orphan.path == journal.path
+    assert orphan.load() == _replay(EVENTS[:1])
+    # Claimed journals are not offered to another instance
+    assert claim_orphaned_journals(tmp_path) == []
+
+    orphan.discard()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_orphaned_journals_newest_first(tmp_path):
+    for i, pid in enumerate([10, 30, 20]):
+        path = tmp_path / f"dirigo-config.journal.{pid}.jsonl"
+        path.write_text(json.dumps(EVENTS[0]) + "\n", encoding="utf-8")
+        os.utime(path, ns=(0, (pid + 1) * 10**9))
+    (tmp_path / "unrelated.jsonl").write_text("", encoding="utf-8")
+
+    orphans = claim_orphaned_journals(tmp_path)
+    try:
+        assert [o.path.name for o in orphans] == [
+            "dirigo-config.journal.30.jsonl",
+            "dirigo-config.journal.20.jsonl",
+            "dirigo-config.journal.10.jsonl",
+        ]
+    finally:
+        for orphan in orphans:
+            orphan.discard()
+    assert [p.name for p in tmp_path.iterdir()] == ["unrelated.jsonl"]
@@ -0,0 +1,137 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("dirigo.hw_interfaces.hw_interface")
+
+from dirigo_config.discovery.devices import EntryPointNotFound  # noqa: E402
+from dirigo_config.discovery.environment import EnvironmentSnapshotter  # noqa: E402
+from dirigo_config.lockfile import (  # noqa: E402
+    LockedEntryPoint, LockfileMismatchError, LockVerifier, check_lockfile,
+    lock_entry_point, lockfile_path_for, lockfile_to_toml, read_lockfile,
+    write_config_with_lockfile, write_lockfile,
+)
+
+
+CAMERAS = "dirigo.devices.cameras"
+RECORD = "dirigo_basler/__init__.py,sha256=abc,10\n"
+
+
+@pytest.fixture
+def basler(make_dist) -> Path:
+    return make_dist(
+        "dirigo-basler",
+        version="1.0",
+        entry_points={CAMERAS: {"ace": "dirigo_basler:Ace"}},
+        record=RECORD,
+    )
+
+
+def _verifier(site_dir: Path) -> LockVerifier:
+    return LockVerifier(EnvironmentSnapshotter([str(site_dir)]))
+
+
+def test_lockfile_path_for():
+    assert lockfile_path_for(Path("cfg/my_system.system.toml")) == Path("cfg/my_system.system.lock.toml")
+
+
+def test_lock_entry_point(basler):
+    locked = lock_entry_point(CAMERAS, "ace")
+
+    assert locked.group == CAMERAS
+    assert locked.name == "ace"
+    assert locked.distribution == "dirigo-basler"
+    assert locked.version == "1.0"
+    assert locked.record_hash.startswith("sha256:")
+
+
+def test_lock_entry_point_not_found(site_dir):
+    with pytest.raises(EntryPointNotFound):
+        lock_entry_point(CAMERAS, "does_not_exist")
+
+
+def test_write_read_roundtrip(tmp_path, basler):
+    locked = [
+        lock_entry_point(CAMERAS, "ace"),
+        LockedEntryPoint("dirigo.devices.scanners", 'odd "name"', "dirigo-x", "2.0", ""),
+    ]
+    path = tmp_path / "my_system.system.lock.toml"
+    write_lockfile(path, locked)
+
+    assert lockfile_to_toml(locked).startswith("generated_by = ")
+    assert sorted(read_lockfile(path), key=lambda l: l.group) == sorted(locked, key=lambda l: l.group)
+
+
+def test_verify_matching_environment(site_dir, basler):
+    assert _verifier(site_dir).verify([lock_entry_point(CAMERAS, "ace")]) == []
+
+
+def test_verify_reports_upgrade(site_dir, basler, make_dist):
+    locked = lock_entry_point(CAMERAS, "ace")
+    shutil.rmtree(basler)
+    make_dist("dirigo-basler", version="2.0", entry_points={CAMERAS: {"ace": "dirigo_basler:Ace"}})
+
+    [mismatch] = _verifier(site_dir).verify([locked])
+    assert mismatch.problem == "version 2.0 installed, 1.0 locked"
+
+
+def test_verify_reports_rebuilt_files(site_dir, basler):
+    locked = lock_entry_point(CAMERAS, "ace")
+    (basler / "RECORD").write_text(RECORD + "dirigo_basler/extra.py,,\n", encoding="utf-8")
+
+    [mismatch] = _verifier(site_dir).verify([locked])
+    assert mismatch.problem == "installed files differ from the locked build"
+
+
+def test_verify_reports_missing_entry_point_and_distribution(site_dir, basler):
+    locked = [
+        LockedEntryPoint(CAMERAS, "gone", "dirigo-basler", "1.0", ""),
+        LockedEntryPoint(CAMERAS, "ace", "dirigo-uninstalled", "1.0", ""),
+    ]
+
+    problems = [m.problem for m in _verifier(site_dir).verify(locked)]
+    assert problems == ["entry point is no longer provided", "distribution is not installed"]
+
+
+def test_check_lockfile(tmp_path, site_dir, basler):
+    good = tmp_path / "good.system.lock.toml"
+    write_lockfile(good, [lock_entry_point(CAMERAS, "ace")])
+    check_lockfile(good)
+
+    stale = tmp_path / "stale.system.lock.toml"
+    write_lockfile(stale, [LockedEntryPoint(CAMERAS, "ace", "dirigo-basler", "0.9", "")])
+    with pytest.raises(LockfileMismatchError, match="version 1.0 installed, 0.9 locked"):
+        check_lockfile(stale)
+
+
+def test_write_config_with_lockfile(tmp_path):
+    config = tmp_path / "my_system.system.toml"
+    locked = [LockedEntryPoint(CAMERAS, "ace", "dirigo-basler", "1.0", "")]
+
+    write_config_with_lockfile(config, "config = 1\n", locked)
+
+    assert config.read_text(encoding="utf-8") == "config = 1\n"
+    assert read_lockfile(lockfile_path_for(config)) == locked
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "my_system.system.lock.toml", "my_system.system.toml"
+    ]
+
+
+def test_write_config_with_lockfile_keeps_previous_pair_on_error(tmp_path, monkeypatch):
+    config = tmp_path / "my_system.system.toml"
+    lock = lockfile_path_for(config)
+    write_config_with_lockfile(config, "config = 1\n", [])
+    old_lock = lock.read_text(encoding="utf-8")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        write_config_with_lockfile(config, "config = 2\n", [LockedEntryPoint(CAMERAS, "ace", "d", "2", "")])
+
+    assert config.read_text(encoding="utf-8") == "config = 1\n"
+    assert lock.read_text(encoding="utf-8") == old_lock
+    assert sorted(p.name for p in tmp_path.iterdir()) == [lock.name, config.name]
@@ -0,0 +1,140 @@
+import shutil
+import time
+
+import pytest
+
+pytest.importorskip("dirigo.hw_interfaces.hw_interface")
+
+from dirigo_config.discovery import search  # noqa: E402
+from dirigo_config.discovery.search import (  # noqa: E402
+    SearchEntry, SearchIndex, TitleCache, build_search_index, entries_for_distribution,
+)
+
+
+CAMERAS = "dirigo.devices.cameras"
+DIGITIZERS = "dirigo.devices.digitizers"
+
+
+def _entry(kind, name, title=None, vendor="", distribution="dirigo-plugin") -> SearchEntry:
+    return SearchEntry(
+        kind=kind,
+        group=f"dirigo.devices.{kind}",
+        name=name,
+        title=title,
+        vendor=vendor,
+        distribution=distribution,
+    )
+
+
+ACE = _entry("cameras", "basler_ace", "Basler ace USB3", "Basler AG", "dirigo-basler")
+ALAZAR = _entry("digitizers", "alazar", "AlazarTech ATS9440", "Alazar Technologies", "dirigo-alazar")
+NI = _entry("digitizers", "ni_daq", None, "National Instruments", "dirigo-ni")
+
+
+@pytest.fixture
+def index() -> SearchIndex:
+    return SearchIndex([ACE, ALAZAR, NI])
+
+
+def _names(results):
+    return [e.name for e in results]
+
+
+def test_prefix_search(index):
+    assert _names(index.search("bas")) == ["basler_ace"]
+    # Equal scores: shorter labels first
+    assert _names(index.search("digitizers")) == ["ni_daq", "alazar"]
+    # Every term has to match
+    assert _names(index.search("digit nat")) == ["ni_daq"]
+    assert index.search("") == []
+
+
+def test_name_and_title_rank_above_vendor():
+    by_vendor = _entry("cameras", "cam", vendor="Alazar Technologies")
+    index = SearchIndex([by_vendor, ALAZAR])
+    assert _names(index.search("alazar")) == ["alazar", "cam"]
+
+
+def test_fuzzy_search(index):
+    assert _names(index.search("bslr")) == ["basler_ace"]
+    assert _names(index.search("alztch")) == ["alazar"]
+    # Fuzzy matches start at a word and stay within one field
+    assert index.search("slr") == []
+    assert index.search("aceag") == []
+
+
+def test_fuzzy_search_stays_fast_on_pathological_queries():
+    entries = [_entry("cameras", "a" * 60 + str(i), distribution="dirigo-" + "a" * 40) for i in range(2000)]
+    index = SearchIndex(entries)
+
+    start = time.perf_counter()
+    assert index.search("a" * 20 + "z") == []
+    assert time.perf_counter() - start < 1.0
+
+
+def test_fuzzy_search_considers_every_entry():
+    entries = [_entry("cameras", f"dummy_{i}", distribution="dirigo-dummy") for i in range(2500)]
+    index = SearchIndex(entries + [_entry("scanners", "thorlabs_galvo", distribution="dirigo-thorlabs")])
+
+    assert _names(index.search("thlbs")) == ["thorlabs_galvo"]
+
+
+def test_update_distribution_replaces_entries(index):
+    upgraded = _entry("cameras", "basler_boost", "Basler boost", "Basler AG", "dirigo-basler")
+    index.update_distribution("Dirigo_Basler", [upgraded])
+
+    assert index.get(ACE.key) is None
+    assert _names(index.search("basler")) == ["basler_boost"]
+    assert index.search("usb3") == []
+
+    index.update_distribution("dirigo-basler", [])
+    assert index.search("basler") == []
+    assert len(index) == 2
+
+
+def test_set_title(index):
+    assert index.search("pcie") == []
+    index.set_title(NI.key, "NI PCIe-6374")
+
+    assert index.get(NI.key).label == "NI PCIe-6374"
+    assert _names(index.search("pcie")) == ["ni_daq"]
+
+
+def test_entries_for_distribution(make_dist):
+    make_dist(
+        "dirigo-basler",
+        entry_points={CAMERAS: {"ace": "dirigo_basler:Ace"}, "console_scripts": {"x": "y:z"}},
+        author_email='"Basler AG" <support@example.com>',
+    )
+
+    [entry] = entries_for_distribution("dirigo-basler", {(CAMERAS, "ace"): "Basler ace"})
+    assert entry == SearchEntry("cameras", CAMERAS, "ace", "Basler ace", "Basler AG", "dirigo-basler")
+    assert entries_for_distribution("dirigo-not-installed") == []
+
+
+def test_title_cache_is_per_version(tmp_path, site_dir, make_dist, monkeypatch):
+    dist_info = make_dist("dirigo-basler", entry_points={CAMERAS: {"ace": "dirigo_basler:Ace"}})
+    path = tmp_path / "titles.json"
+
+    cache = TitleCache(path)
+    cache.set_title("dirigo-basler", (CAMERAS, "ace"), "Basler ace")
+    cache.save()
+
+    reloaded = TitleCache(path)
+    assert reloaded.titles_for("dirigo_basler") == {(CAMERAS, "ace"): "Basler ace"}
+    assert build_search_index(["dirigo-basler"], reloaded).get((CAMERAS, "ace")).title == "Basler ace"
+
+    # Learning more titles needs no metadata lookup once titles_for has run
+    def fail(dist_name):
+        raise AssertionError("distribution metadata looked up again")
+
+    with monkeypatch.context() as m:
+        m.setattr(search, "distribution", fail)
+        reloaded.set_title("Dirigo_Basler", (CAMERAS, "ace2"), "Basler ace 2")
+    reloaded.save()
+    assert TitleCache(path).titles_for("dirigo-basler")[(CAMERAS, "ace2")] == "Basler ace 2"
+
+    # An upgrade may rename devices, so titles of other versions are not reused
+    shutil.rmtree(dist_info)
+    make_dist("dirigo-basler", version="2.0", entry_points={CAMERAS: {"ace": "dirigo_basler:Ace"}})
+    assert TitleCache(path).titles_for("dirigo-basler") == {}
@@ -0,0 +1,198 @@
+import pytest
+
+from dirigo_config.state import ConfigState, DeviceState, History, event_key
+
+
+def _replay(events, state: ConfigState = ConfigState()) -> ConfigState:
+    for event in events:
+        state = state.apply(event)
+    return state
+
+
+def _device(n, field, value):
+    return {"op": "device", "device": n, "field": field, "value": value}
+
+
+CONFIGURED = _replay([
+    {"op": "meta", "field": "name", "value": "two-photon"},
+    {"op": "add_device", "device": 1},
+    _device(1, "name", "digitizer"),
+    _device(1, "kind", "digitizer"),
+    _device(1, "entry_point", "alazar"),
+    _device(1, "config.sample_rate", "125 MS/s"),
+    {"op": "add_device", "device": 2},
+    _device(2, "kind", "scanner"),
+])
+
+
+def test_event_key():
+    assert event_key(_device(1, "name", "a")) == event_key(_device(1, "name", "b"))
+    assert event_key(_device(1, "name", "a")) != event_key(_device(2, "name", "a"))
+
+
+def test_apply_folds_events():
+    assert CONFIGURED.meta == {"name": "two-photon"}
+    assert CONFIGURED.devices[1] == DeviceState(
+        name="digitizer", kind="digitizer", entry_point="alazar", config={"sample_rate": "125 MS/s"}
+    )
+    assert CONFIGURED.devices[2] == DeviceState(kind="scanner")
+
+
+def test_apply_without_change_returns_self():
+    assert CONFIGURED.apply({"op": "meta", "field": "name", "value": "two-photon"}) is CONFIGURED
+    assert CONFIGURED.apply(_device(1, "config.sample_rate", "125 MS/s")) is CONFIGURED
+    assert CONFIGURED.apply({"op": "add_device", "device": 1}) is CONFIGURED
+    assert CONFIGURED.apply({"op": "unknown"}) is CONFIGURED
+
+
+def test_apply_shares_unchanged_devices():
+    edited = CONFIGURED.apply(_device(2, "name", "galvo"))
+
+    assert edited.devices[1] is CONFIGURED.devices[1]
+    assert CONFIGURED.changed_devices(edited) == {2}
+    assert CONFIGURED.changed_meta(edited) == set()
+
+
+def test_new_kind_or_entry_point_clears_dependent_fields():
+    new_ep = CONFIGURED.apply(_device(1, "entry_point", "ni"))
+    assert new_ep.devices[1].config == {}
+    assert new_ep.devices[1].name == "digitizer"
+
+    new_kind = CONFIGURED.apply(_device(1, "kind", "camera"))
+    assert new_kind.devices[1] == DeviceState(name="digitizer", kind="camera")
+
+
+def test_unset_config_field():
+    unset = CONFIGURED.apply(
+        {"op": "device", "device": 1, "field": "config.sample_rate", "unset": True}
+    )
+    assert unset.devices[1].config == {}
+
+
+@pytest.mark.parametrize("events", [
+    [],
+    [{"op": "meta", "field": "name", "value": "confocal"}],
+    [_device(1, "config.sample_rate", "250 MS/s"), _device(1, "config.channels", 2)],
+    [_device(1, "entry_point", "ni"), _device(1, "config.rate", 1)],
+    [_device(1, "kind", "camera"), _device(1, "entry_point", "basler")],
+    [_device(2, "kind", None)],
+])
+def test_events_to_roundtrip(events):
+    target = _replay(events, CONFIGURED)
+
+    assert _replay(CONFIGURED.events_to(target), CONFIGURED) == target
+    assert _replay(target.events_to(CONFIGURED), target) == CONFIGURED
+
+
+def test_events_to_adds_devices_but_never_removes_them():
+    target = _replay([{"op": "add_device", "device": 3}, _device(3, "name", "stage")], CONFIGURED)
+
+    assert CONFIGURED.events_to(target) == [{"op": "add_device", "device": 3}, _device(3, "name", "stage")]
+    # There is no event removing a device; going back only empties it
+    assert _replay(target.events_to(CONFIGURED), target).devices[3] == DeviceState()
+
+
+def test_events_to_unsets_config_fields():
+    target = CONFIGURED.apply({"op": "device", "device": 1, "field": "config.sample_rate", "unset": True})
+
+    assert CONFIGURED.events_to(target) == [
+        {"op": "device", "device": 1, "field": "config.sample_rate", "unset": True}
+    ]
+
+
+def test_to_events_replays_to_state():
+    events = CONFIGURED.to_events()
+
+    assert _replay(events) == CONFIGURED
+    assert ConfigState().to_events() == []
+
+
+def test_history_coalesces_typing():
+    history = History(coalesce_s=60.0)
+    for text in ["t", "tw", "two"]:
+        history.record({"op": "meta", "field": "name", "value": text})
+    history.record({"op": "meta", "field": "description", "value": "x"})
+
+    old, new = history.undo()
+    assert old.meta == {"name": "two", "description": "x"}
+    assert new.meta == {"name": "two"}
+    _, new = history.undo()
+    assert new.meta == {}
+    assert not history.can_undo
+
+
+def test_history_does_not_coalesce_after_the_window():
+    history = History(coalesce_s=0.0)
+    history.record({"op": "meta", "field": "name", "value": "a"})
+    history.record({"op": "meta", "field": "name", "value": "ab"})
+
+    _, new = history.undo()
+    assert new.meta == {"name": "a"}
+
+
+def test_history_undo_redo():
+    history = History()
+    assert history.undo() is None and history.redo() is None
+
+    history.record({"op": "meta", "field": "name", "value": "a"})
+    first = history.current
+    history.record({"op": "meta", "field": "description", "value": "b"})
+    second = history.current
+
+    assert history.undo() == (second, first)
+    assert history.redo() == (first, second)
+
+    history.undo()
+    history.record({"op": "meta", "field": "description", "value": "c"})
+    assert not history.can_redo
+
+
+def test_history_ignores_edits_without_change():
+    history = History()
+    history.record({"op": "meta", "field": "name", "value": "a"})
+    history.record({"op": "meta", "field": "name", "value": "a"})
+    history.undo()
+
+    assert not history.can_undo
+
+
+def test_history_is_bounded():
+    history = History(max_length=3, coalesce_s=0.0)
+    for i in range(10):
+        history.record({"op": "meta", "field": "name", "value": i})
+
+    steps = 0
+    while history.undo():
+        steps += 1
+    assert steps == 3
+    assert history.current.meta == {"name": 6}
+
+
+def test_history_grouped_is_one_step():
+    history = History(coalesce_s=0.0)
+    history.record({"op": "add_device", "device": 1})
+    with history.grouped():
+        history.record(_device(1, "kind", "camera"))
+        history.record(_device(1, "entry_point", "basler"))
+    history.record(_device(1, "name", "camera"))
+
+    history.undo()
+    _, new = history.undo()
+    assert new.devices[1] == DeviceState()
+    assert not history.can_undo
+
+
+def test_history_add_device_is_not_undone():
+    history = History()
+    history.record({"op": "meta", "field": "name", "value": "a"})
+    history.record({"op": "add_device", "device": 1})
+    history.record(_device(1, "kind", "camera"))
+
+    history.undo()
+    _, new = history.undo()
+    assert new.meta == {}
+    assert new.devices == {1: DeviceState()}
+
+    history.redo()
+    _, new = history.redo()
+    assert new.devices[1].kind == "camera"